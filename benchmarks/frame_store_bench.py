@@ -0,0 +1,148 @@
+"""
+Time-to-first-frame benchmark: loose PNGs vs the memory-mapped frame store.
+
+Lays the fighters' frames (the PNGs in jjk_game/images) out twice in a
+temporary folder: as loose PNGs (what Pygame Zero loads today) and as
+<character>_frames.bin stores. The PNGs are timed twice, loaded one at a time by Pygame Zero
+("png") and decoded in the background by a frame_sources.FramePreloader
+("preload"), the way the games load them. Each trial runs in a fresh Python
+process with SDL's dummy video driver, loads every frame of both characters
+and draws the first frame. The preloader doesn't hold up the first frame (the
+two frames it shows load from disk if they aren't in yet), so in "preload"
+mode the first frame comes before every frame is loaded.
+
+    python benchmarks/frame_store_bench.py
+    python benchmarks/frame_store_bench.py --repeat 20 --json results.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("png", "preload", "store")
+
+
+def prepare(work_dir):
+    """Write the PNG and store layouts of the game's frames into work_dir."""
+    sys.path.insert(0, REPO_ROOT)
+    import crop_spritesheet
+
+    # The sheet tables use paths relative to the repository root
+    os.chdir(REPO_ROOT)
+    entries = crop_spritesheet.select_sheets()
+    png_images = os.path.join(work_dir, "png", "images")
+    os.makedirs(png_images)
+    for _, name, _, _ in crop_spritesheet.atlas_frames(entries):
+        shutil.copy(os.path.join(crop_spritesheet.GAME_IMAGES, name + ".png"), png_images)
+
+    crop_spritesheet.write_frame_stores(entries, os.path.join(work_dir, "store", "images"))
+    return len(os.listdir(png_images))
+
+
+def compared(speedup):
+    """How a time compares, given baseline time / its time: "1.4x faster than", "1.4x slower than", ..."""
+    if round(speedup, 1) == 1.0:
+        return "about as fast as"
+    if speedup > 1:
+        return f"{speedup:.1f}x faster than"
+    return f"{1 / speedup:.1f}x slower than"
+
+
+def draw_first_frame(screen, gojo, jinwoo):
+    """Draw both fighters' first stand frame and show it."""
+    import pygame
+    screen.fill((50, 100, 150))
+    screen.blit(gojo, (200, 450))
+    screen.blit(jinwoo, (1000, 450))
+    pygame.display.flip()
+
+
+def run_trial(mode, work_dir):
+    """Child process: load every frame the given way, draw one frame, print the timings as JSON."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((1200, 600))
+
+    sys.path.insert(0, os.path.join(REPO_ROOT, "jjk_game"))
+    from pgzero import loaders
+    import frame_sources
+    # Both PNG modes load the same loose files
+    loaders.set_root(os.path.join(work_dir, "png" if mode == "preload" else mode))
+
+    start = time.perf_counter()
+    if mode == "preload":
+        names = sorted(os.path.splitext(name)[0] for name in os.listdir(os.path.join(loaders.root, "images")))
+        preloader = frame_sources.FramePreloader(names)
+        draw_first_frame(screen, loaders.images.load("gojo-stand_1"), loaders.images.load("jinwoo_stand_1"))
+        first_frame = time.perf_counter()
+        # The games poll once per update; here there is nothing else to do in between
+        while not preloader.poll():
+            time.sleep(0.001)
+        frames = {name: loaders.images.load(name) for name in names}
+        loaded = time.perf_counter()
+    else:
+        if mode == "png":
+            names = sorted(os.path.splitext(name)[0] for name in os.listdir(os.path.join(loaders.root, "images")))
+            frames = {name: loaders.images.load(name) for name in names}
+        else:
+            frames = {}
+            for character in ("gojo", "jinwoo"):
+                frames.update(frame_sources.load_store(character))
+        loaded = time.perf_counter()
+        draw_first_frame(screen, frames["gojo-stand_1"], frames["jinwoo_stand_1"])
+        first_frame = time.perf_counter()
+
+    print(json.dumps({"frames": len(frames),
+                      "load_ms": (loaded - start) * 1000,
+                      "first_frame_ms": (first_frame - start) * 1000}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="fresh processes per mode (default: 10)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE as JSON")
+    parser.add_argument("--trial", nargs=2, metavar=("MODE", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.trial:
+        run_trial(*args.trial)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="frame_store_bench_")
+    try:
+        frame_count = prepare(work_dir)
+        print(f"{frame_count} frames, {args.repeat} fresh processes per mode")
+        results = {}
+        for mode in MODES:
+            trials = []
+            for _ in range(args.repeat):
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), "--trial", mode, work_dir],
+                                        check=True, capture_output=True, text=True).stdout
+                trials.append(json.loads(output.strip().splitlines()[-1]))
+            results[mode] = {
+                "load_ms": statistics.median(t["load_ms"] for t in trials),
+                "first_frame_ms": statistics.median(t["first_frame_ms"] for t in trials),
+            }
+            print(f"{mode:>7}: load {results[mode]['load_ms']:7.2f} ms, "
+                  f"first frame {results[mode]['first_frame_ms']:7.2f} ms (median)")
+        for mode in ("preload", "store"):
+            speedup = results["png"]["first_frame_ms"] / results[mode]["first_frame_ms"]
+            print(f"{mode} reaches the first frame {compared(speedup)} png")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"frames": frame_count, "repeat": args.repeat, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
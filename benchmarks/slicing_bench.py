@@ -0,0 +1,221 @@
+"""
+Stage-by-stage benchmark of the sprite slicing pipeline in crop_spritesheet.py.
+
+Each sheet goes through the same steps as slice_sheet(), timed separately:
+
+- load: decode the sheet PNG to RGBA
+- crop: cut out the frames (for auto sheets: find them in the keyed sheet)
+- key:  make the background transparent (for auto sheets: the whole sheet)
+- save: write the frame PNGs
+
+It runs on synthetic sheets (a row of blobby sprites on a flat background,
+any frame size and count) and on the real gojo_frames / jin-woo_frames
+sheets, and reports frames/sec, megapixels/sec and peak memory per stage.
+
+    python benchmarks/slicing_bench.py
+    python benchmarks/slicing_bench.py --frames 8 64 256 --frame-size 128x160
+    python benchmarks/slicing_bench.py --no-real --repeat 10 --json results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+import crop_spritesheet
+
+STAGES = ("load", "crop", "key", "save")
+# Background of the synthetic sheets, a flat green like the real ones use
+SYNTHETIC_BACKGROUND = (34, 177, 76)
+
+
+def make_sheet(path, frame_width, frame_height, frames, seed=0):
+    """Write a synthetic one-row sprite sheet and return its (width, height, count, x_offset) config.
+
+    Every frame gets a few filled ellipses in random colors (with a little
+    per-pixel noise, like real pixel art) on a flat background.
+    """
+    rng = np.random.default_rng(seed)
+    sheet = np.empty((frame_height, frame_width * frames, 4), np.uint8)
+    sheet[...] = SYNTHETIC_BACKGROUND + (255,)
+    ys, xs = np.mgrid[0:frame_height, 0:frame_width]
+    for i in range(frames):
+        frame = sheet[:, i * frame_width:(i + 1) * frame_width]
+        for _ in range(rng.integers(3, 7)):
+            cx, cy = rng.uniform(0.2, 0.8) * frame_width, rng.uniform(0.2, 0.9) * frame_height
+            rx, ry = rng.uniform(0.05, 0.3) * frame_width, rng.uniform(0.05, 0.3) * frame_height
+            inside = ((xs - cx) / rx) ** 2 + ((ys - cy) / ry) ** 2 <= 1
+            color = rng.integers(0, 256, 3)
+            noise = rng.integers(-12, 13, (int(inside.sum()), 3))
+            frame[inside, :3] = np.clip(color + noise, 0, 255)
+    Image.fromarray(sheet, "RGBA").save(path)
+    return (frame_width, frame_height, frames, 0)
+
+
+@contextmanager
+def stage(name, seconds, peaks=None):
+    """Time a `with` block into seconds[name]; with a `peaks` dict, also trace its peak memory.
+
+    NumPy reports its arrays to tracemalloc, so the peak covers the frame
+    arrays; Pillow's own image buffers are not traced.
+    """
+    if peaks is not None:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds[name] = time.perf_counter() - start
+        if peaks is not None:
+            peaks[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def run_stages(sheet_file, config, output_folder, peaks=None):
+    """Slice one sheet stage by stage.
+
+    Returns ({stage: seconds}, frame count, sheet pixels, frame pixels). Pass
+    a dict as `peaks` to also get each stage's peak memory (this slows the
+    stages down, so the timings of such a run aren't used).
+    """
+    seconds = {}
+    with stage("load", seconds, peaks):
+        image = Image.open(sheet_file).convert("RGBA")
+
+    if config == crop_spritesheet.AUTO:
+        # Auto sheets are keyed as a whole first, then the frames are found in the mask
+        with stage("key", seconds, peaks):
+            keyed_sheet = crop_spritesheet.key_background(np.asarray(image))
+        with stage("crop", seconds, peaks):
+            boxes = crop_spritesheet.find_frames(keyed_sheet[..., 3] > 0)
+            keyed = [keyed_sheet[top:bottom, left:right] for left, top, right, bottom in boxes]
+    else:
+        with stage("crop", seconds, peaks):
+            boxes = crop_spritesheet.frame_boxes(sheet_file, config)
+            cropped = np.stack([np.asarray(image.crop(box)) for box in boxes])
+        with stage("key", seconds, peaks):
+            keyed = crop_spritesheet.key_background(cropped)
+
+    with stage("save", seconds, peaks):
+        for i, frame in enumerate(keyed):
+            path = os.path.join(output_folder, crop_spritesheet.frame_filename(sheet_file, i))
+            crop_spritesheet.save_frame(frame, path)
+
+    frame_pixels = sum((right - left) * (bottom - top) for left, top, right, bottom in boxes)
+    return seconds, len(boxes), image.width * image.height, frame_pixels
+
+
+def bench_case(case, sheet_file, config, repeat, work_dir):
+    """Benchmark one sheet. Returns its result dict (median time per stage plus throughput)."""
+    output_folder = os.path.join(work_dir, "out", case.replace("/", "_"))
+    runs = []
+    for _ in range(repeat):
+        shutil.rmtree(output_folder, ignore_errors=True)
+        os.makedirs(output_folder)
+        runs.append(run_stages(sheet_file, config, output_folder))
+    peaks = {}
+    run_stages(sheet_file, config, output_folder, peaks)
+
+    _, frames, sheet_pixels, frame_pixels = runs[0]
+    stages = {}
+    for name in STAGES:
+        seconds = statistics.median(times[name] for times, _, _, _ in runs)
+        # Loading works on the whole sheet, the other stages on the frames
+        pixels = sheet_pixels if name == "load" else frame_pixels
+        stages[name] = {
+            "seconds": seconds,
+            "frames_per_sec": frames / seconds if seconds else None,
+            "mp_per_sec": pixels / 1e6 / seconds if seconds else None,
+            "peak_mb": peaks[name] / 2 ** 20,
+        }
+    total = sum(numbers["seconds"] for numbers in stages.values())
+    return {"name": case, "frames": frames, "sheet_megapixels": sheet_pixels / 1e6,
+            "frame_megapixels": frame_pixels / 1e6, "total_seconds": total,
+            "frames_per_sec": frames / total if total else None, "stages": stages}
+
+
+def print_case(result):
+    print(f"{result['name']}: {result['frames']} frames, {result['frame_megapixels']:.2f} MP, "
+          f"{result['total_seconds'] * 1000:.1f} ms ({result['frames_per_sec']:.0f} frames/s)")
+    for stage, numbers in result["stages"].items():
+        print(f"  {stage:>4}: {numbers['seconds'] * 1000:8.2f} ms  {numbers['frames_per_sec']:9.0f} frames/s  "
+              f"{numbers['mp_per_sec']:7.1f} MP/s  peak {numbers['peak_mb']:6.1f} MB")
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where the resource module is missing."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def parse_size(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, nargs="+", default=[8, 32, 128],
+                        help="frame counts of the synthetic sheets (default: 8 32 128)")
+    parser.add_argument("--frame-size", type=parse_size, default=(96, 128), metavar="WxH",
+                        help="frame size of the synthetic sheets (default: 96x128)")
+    parser.add_argument("--no-synthetic", action="store_true", help="skip the synthetic sheets")
+    parser.add_argument("--no-real", action="store_true", help="skip the real sprite sheets")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per sheet, the median is reported (default: 5)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE as JSON")
+    args = parser.parse_args(argv)
+    # Resolved now, because the real sheets are read from the repository root
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    work_dir = tempfile.mkdtemp(prefix="slicing_bench_")
+    results = []
+    try:
+        if not args.no_synthetic:
+            frame_width, frame_height = args.frame_size
+            for frames in args.frames:
+                sheet_file = os.path.join(work_dir, f"synthetic_{frames}.png")
+                config = make_sheet(sheet_file, frame_width, frame_height, frames)
+                results.append(bench_case(f"synthetic {frame_width}x{frame_height} x{frames}",
+                                          sheet_file, config, args.repeat, work_dir))
+                print_case(results[-1])
+
+        if not args.no_real:
+            # The sheet tables use paths relative to the repository root
+            os.chdir(REPO_ROOT)
+            for sheet_file, _, config in crop_spritesheet.select_sheets():
+                results.append(bench_case(sheet_file, sheet_file, config, args.repeat, work_dir))
+                print_case(results[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if peak_rss_mb() is not None:
+        print(f"Peak memory of the whole run: {peak_rss_mb():.1f} MB")
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__,
+                       "pillow": Image.__version__, "repeat": args.repeat,
+                       "peak_rss_mb": peak_rss_mb(), "cases": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
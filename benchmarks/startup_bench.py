@@ -0,0 +1,140 @@
+"""
+Startup benchmark: how long each game takes to get its first frame on screen.
+
+Every trial starts one game in a fresh Python process with SDL's dummy video
+and audio drivers (no window) and times three steps, the way pgzrun runs a
+game:
+
+- import: pygame, Pygame Zero and pgzhelper
+- init:   Pygame Zero's setup and the game's own module code (its imports,
+          Actors, frames, ...)
+- first frame: one update() and one draw(), shown on the screen
+
+Games with a LAZY_STARTUP setting run both ways ("eager" and "lazy"), to
+show what it saves:
+
+    python benchmarks/startup_bench.py
+    python benchmarks/startup_bench.py --games fighting_game --repeat 20 --json results.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAMES = {
+    "catch_the_stars": "catch_the_stars/main.py",
+    "flappy_bird": "flappy_bird/main.py",
+    "jjk": "jjk_game/main.py",
+    "fighting_game": "jjk_game/fighting_game.py",
+}
+MODES = ("eager", "lazy")
+STEPS = ("import_ms", "init_ms", "first_frame_ms", "total_ms")
+
+
+def game_source(path, lazy):
+    """The game's code, with LAZY_STARTUP switched on for the lazy run."""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    if lazy:
+        source = re.sub(r"^LAZY_STARTUP = .*$", "LAZY_STARTUP = True", source, flags=re.MULTILINE)
+    return source
+
+
+def run_trial(game, mode):
+    """Child process: start the game, draw one frame, print the timings as JSON."""
+    start = time.perf_counter()
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    import pygame
+    import pgzhelper  # (not used here, but every game that imports it pays for it)
+    from pgzero.game import PGZeroGame
+    from pgzero.runner import prepare_mod
+    imported = time.perf_counter()
+
+    # What pgzrun does with the game's file (it finds its images next to it)
+    path = os.path.join(REPO_ROOT, GAMES[game])
+    os.chdir(os.path.dirname(path))
+    sys.path.insert(0, os.path.dirname(path))
+    code = compile(game_source(path, mode == "lazy"), os.path.basename(path), "exec")
+    module = type(sys)(os.path.splitext(os.path.basename(path))[0])
+    module.__file__ = path
+    sys.modules[module.__name__] = module
+    sys._pgzrun = True
+    prepare_mod(module)
+    exec(code, module.__dict__)
+    initialised = time.perf_counter()
+
+    game_loop = PGZeroGame(module)
+    game_loop.reinit_screen()
+    update = game_loop.get_update_func()
+    if update:
+        update(1 / 60)
+    game_loop.get_draw_func()()
+    pygame.display.flip()
+    first_frame = time.perf_counter()
+
+    print(json.dumps({"import_ms": (imported - start) * 1000,
+                      "init_ms": (initialised - imported) * 1000,
+                      "first_frame_ms": (first_frame - initialised) * 1000,
+                      "total_ms": (first_frame - start) * 1000}))
+
+
+def compared(speedup):
+    """How the lazy start compares, given eager time / lazy time: "1.4x faster", "1.4x slower", ..."""
+    if round(speedup, 1) == 1.0:
+        return "about as fast"
+    if speedup > 1:
+        return f"{speedup:.1f}x faster"
+    return f"{1 / speedup:.1f}x slower"
+
+
+def has_lazy_mode(game):
+    return "LAZY_STARTUP = " in game_source(os.path.join(REPO_ROOT, GAMES[game]), False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", nargs="+", choices=sorted(GAMES), default=list(GAMES),
+                        help="games to start (default: all of them)")
+    parser.add_argument("--repeat", type=int, default=10, help="fresh processes per game and mode (default: 10)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE as JSON")
+    parser.add_argument("--trial", nargs=2, metavar=("GAME", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.trial:
+        run_trial(*args.trial)
+        return
+
+    print(f"{args.repeat} fresh processes per game and mode, median times")
+    results = {}
+    for game in args.games:
+        results[game] = {}
+        for mode in MODES if has_lazy_mode(game) else MODES[:1]:
+            trials = []
+            for _ in range(args.repeat):
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), "--trial", game, mode],
+                                        check=True, capture_output=True, text=True).stdout
+                # The games print things of their own; the timings are the last line
+                trials.append(json.loads(output.strip().splitlines()[-1]))
+            results[game][mode] = {step: statistics.median(t[step] for t in trials) for step in STEPS}
+            timings = results[game][mode]
+            print(f"{game:>16} {mode:>5}: import {timings['import_ms']:7.2f} ms, init {timings['init_ms']:7.2f} ms, "
+                  f"first frame {timings['first_frame_ms']:6.2f} ms, total {timings['total_ms']:7.2f} ms")
+        if "lazy" in results[game]:
+            # LAZY_STARTUP doesn't change the imports (and they vary the most from run to run)
+            eager, lazy = (results[game][mode]["init_ms"] + results[game][mode]["first_frame_ms"] for mode in MODES)
+            print(f"{'':>16} LAZY_STARTUP: init + first frame {eager:.2f} -> {lazy:.2f} ms ({compared(eager / lazy)})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"repeat": args.repeat, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
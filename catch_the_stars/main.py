@@ -12,7 +12,15 @@ This game teaches:
 Created for students aged 13-19 learning Python with AI assistance.
 """
 
+import os
 import random
+import sys
+
+# The text cache lives in the folder above this game's folder (shared by all the games)
+from pgzero import loaders
+sys.path.append(os.path.dirname(loaders.root))
+from frame_profiler import FrameProfiler
+from text_cache import text_cache
 
 # ===== GAME SETTINGS =====
 WIDTH = 800
@@ -26,6 +34,11 @@ level = 1
 game_speed = 3
 game_state = "playing"  # "playing", "game_over", "paused"
 
+# ===== FRAME PROFILER =====
+# Press F3 to see how long each part of a frame takes (see frame_profiler.py in the folder above).
+# The timings are saved to frame_profile.csv when the game closes.
+profiler = FrameProfiler(enabled=False, csv_path="frame_profile.csv")
+
 # ===== CREATE GAME OBJECTS =====
 # Player spaceship
 player = Actor("player")
@@ -67,6 +80,7 @@ def draw():
     # Draw main game objects
     player.draw()
     star.draw()
+    profiler.mark("draw")
     
     # Draw UI elements
     draw_ui()
@@ -74,36 +88,37 @@ def draw():
     # Draw game over screen if needed
     if game_state == "game_over":
         draw_game_over()
+    profiler.mark("text")
+    
+    # Finish timing this frame, then show the timings (when F3 is on)
+    profiler.end_frame()
+    profiler.draw(screen, (20, 110))
 
 def draw_ui():
     """Draw the user interface (score, lives, level)"""
     # Score display
-    screen.draw.text(f"Score: {score}", 
+    text_cache.draw(screen, f"Score: {score}", 
                     topleft=(20, 20), 
                     fontsize=40, 
-                    color="white",
-                    fontname="arial")
+                    color="white")
     
     # Lives display
-    screen.draw.text(f"Lives: {'❤️' * lives}", 
+    text_cache.draw(screen, f"Lives: {'❤️' * lives}", 
                     topleft=(20, 70), 
                     fontsize=30, 
-                    color="red",
-                    fontname="arial")
+                    color="red")
     
     # Level display
-    screen.draw.text(f"Level: {level}", 
+    text_cache.draw(screen, f"Level: {level}", 
                     topright=(WIDTH - 20, 20), 
                     fontsize=30, 
-                    color="yellow",
-                    fontname="arial")
+                    color="yellow")
     
     # Instructions
-    screen.draw.text("Use ← → arrow keys to move", 
+    text_cache.draw(screen, "Use ← → arrow keys to move", 
                     bottomleft=(20, HEIGHT - 20), 
                     fontsize=20, 
-                    color="lightblue",
-                    fontname="arial")
+                    color="lightblue")
 
 def draw_game_over():
     """Draw the game over screen"""
@@ -111,29 +126,27 @@ def draw_game_over():
     screen.draw.filled_rect(Rect(0, 0, WIDTH, HEIGHT), (0, 0, 0, 128))
     
     # Game over text
-    screen.draw.text("GAME OVER", 
+    text_cache.draw(screen, "GAME OVER", 
                     center=(WIDTH // 2, HEIGHT // 2 - 50), 
                     fontsize=80, 
-                    color="red",
-                    fontname="arial")
+                    color="red")
     
     # Final score
-    screen.draw.text(f"Final Score: {score}", 
+    text_cache.draw(screen, f"Final Score: {score}", 
                     center=(WIDTH // 2, HEIGHT // 2 + 20), 
                     fontsize=50, 
-                    color="white",
-                    fontname="arial")
+                    color="white")
     
     # Restart instructions
-    screen.draw.text("Press SPACE to restart", 
+    text_cache.draw(screen, "Press SPACE to restart", 
                     center=(WIDTH // 2, HEIGHT // 2 + 80), 
                     fontsize=30, 
-                    color="yellow",
-                    fontname="arial")
+                    color="yellow")
 
 def update():
     """Update game logic - called every frame"""
     global score, lives, level, game_speed, game_state
+    profiler.start_frame()
     
     # Only update if game is playing
     if game_state != "playing":
@@ -141,6 +154,7 @@ def update():
     
     # ===== PLAYER MOVEMENT =====
     handle_player_movement()
+    profiler.mark("input")
     
     # ===== STAR MOVEMENT =====
     handle_star_movement()
@@ -148,11 +162,15 @@ def update():
     # ===== COLLISION DETECTION =====
     handle_collisions()
     
+    profiler.mark("physics")
+    
     # ===== BACKGROUND STARS =====
     update_background_stars()
+    profiler.mark("animation")
     
     # ===== DIFFICULTY PROGRESSION =====
     check_level_progression()
+    profiler.mark("physics")
 
 def handle_player_movement():
     """Handle player spaceship movement"""
@@ -255,6 +273,10 @@ def on_key_down(key):
             game_state = "paused"
         elif game_state == "paused":
             game_state = "playing"
+    
+    # Show/hide the frame timings
+    if key == keys.F3:
+        profiler.toggle()
 
 # ===== GAME STARTUP =====
 # Start background music (optional - uncomment if you want music)
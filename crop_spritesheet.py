@@ -1,5 +1,115 @@
-from PIL import Image
+"""
+Slice the character sprite sheets into individual PNG frames with transparent backgrounds.
+
+Run it as a script to rebuild the output_* folders:
+
+    python crop_spritesheet.py                 # every sheet, one worker per CPU core
+    python crop_spritesheet.py --jobs 1        # one sheet at a time
+    python crop_spritesheet.py --only output_walk --only gojo_frames/jump/jump.png
+    python crop_spritesheet.py --incremental    # only rebuild sheets whose inputs changed
+    python crop_spritesheet.py --auto           # find the frames from the sheet's background (into output_*_auto)
+    python crop_spritesheet.py --only path/to/new-sheet.png   # new sheets are found automatically
+    python crop_spritesheet.py --atlas jjk_game/images         # also pack one atlas per character
+    python crop_spritesheet.py --store jjk_game/images         # also write raw RGBA frame stores
+    python crop_spritesheet.py --indexed jjk_game/images       # also write 8-bit palette PNGs
+    python crop_spritesheet.py --variants       # also write 2x and 2x-mirrored copies of every frame
+
+Or import it and call slice_sheet() / slice_all() from your own code.
+"""
+
+import argparse
+import hashlib
+import json
+import math
 import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+# Manifest used by --incremental to remember what each output folder was built from
+CACHE_MANIFEST = ".slice_cache.json"
+# Bump this when the slicing code changes in a way that changes the output pixels
+CACHE_VERSION = 1
+
+# Frame config value meaning "find the frames from the background mask"
+AUTO = "auto"
+# --auto writes a sheet's frames next to its hand-tuned slices, in <output folder> + this
+AUTO_FOLDER_SUFFIX = "_auto"
+# Auto segmentation: columns gaps narrower than this are treated as part of one frame
+AUTO_MIN_GAP = 2
+# Auto segmentation: blobs with fewer foreground pixels than this are treated as noise
+AUTO_MIN_PIXELS = 8
+
+# --variants: how much the pre-scaled copies are enlarged (nearest neighbour, like actor.scale = 2)
+VARIANT_SCALE = 2
+
+# Empty pixels kept around every frame in an atlas so neighbours never bleed into each other
+ATLAS_PADDING = 1
+
+# The frames the JJK games ship. Some were touched up by hand after slicing, so --atlas,
+# --store and --indexed pack these PNGs rather than the slices (the games and
+# jjk_game/images/hitboxes.json are built from them)
+GAME_IMAGES = os.path.join("jjk_game", "images")
+
+# Frame store layout (jjk_game/frame_sources.py reads it, keep the two in sync):
+#   header:  magic, version, frame count
+#   table:   one entry per frame: NUL-padded name, width, height, pivot x, pivot y, data offset
+#   data:    raw RGBA rows for each frame, every frame starting on a 16-byte boundary
+STORE_MAGIC = b"JJKF"
+STORE_VERSION = 1
+STORE_HEADER = struct.Struct("<4sHI")
+STORE_ENTRY = struct.Struct("<32sHHffQ")
+STORE_ALIGN = 16
+
+# Indexed (8-bit palette) frames: index 0 is the transparent color, the frame colors share the rest
+INDEXED_COLORS = 255
+# Pixels at least this opaque keep their color in indexed frames, the rest become transparent
+INDEXED_ALPHA_CUTOFF = 128
+
+# How close (per RGB channel) a pixel has to be to a corner color to count as background
+BG_TOLERANCE = 25
+
+
+def key_background(frames, tolerance=BG_TOLERANCE):
+    """Make the background of one frame (H, W, 4) or a stack of frames (N, H, W, 4) transparent.
+
+    Each frame samples its own four corner colors. A pixel is background when
+    all of its RGB channels are within `tolerance` of any of those corners,
+    which is the same rule the old getpixel/putpixel loop used.
+    """
+    frames = np.asarray(frames, dtype=np.uint8)
+    single = frames.ndim == 3
+    if single:
+        frames = frames[np.newaxis]
+
+    red, green, blue = frames[..., 0], frames[..., 1], frames[..., 2]
+
+    # Corner colors per frame: top-left, top-right, bottom-left, bottom-right -> (N, 4, 3)
+    corners = frames[:, [0, 0, -1, -1], [0, -1, 0, -1], :3]
+    # Frames of one sheet almost always share a background, so test each distinct color once
+    colors, owner_index = np.unique(corners.reshape(-1, 3), axis=0, return_inverse=True)
+    owner_index = owner_index.reshape(corners.shape[:2])
+
+    levels = np.arange(256)
+    is_background = np.zeros(frames.shape[:3], dtype=bool)
+    for index, (r, g, b) in enumerate(colors.astype(int)):
+        # 256-entry lookup tables: "is this channel value close to the corner color?"
+        match = ((np.abs(levels - r) < tolerance)[red] &
+                 (np.abs(levels - g) < tolerance)[green] &
+                 (np.abs(levels - b) < tolerance)[blue])
+        owners = (owner_index == index).any(axis=1)
+        if owners.all():
+            is_background |= match
+        else:
+            is_background[owners] |= match[owners]
+
+    keyed = frames.copy()
+    keyed[is_background] = 0
+    return keyed[0] if single else keyed
+
 
 # Define the sprite sheets you want to process
 sprite_sheets = [
@@ -35,7 +145,7 @@ frame_configs = [
     (40, 68, 6, 0),   # light_attack - estimated 6 frames
     (40, 68, 4, 5),   # jump - with 5px x-offset to center frames 3 and 4
     (40, 68, 4, 0),   # crouch - wider to prevent cutting off frames 3 and 4
-    (40, 68, 3, 0),   # dash - estimated 3 frames
+    (78, 68, 1, 0),   # dash - one pose, the whole sheet
     # Jin-Woo frame configs (estimated - will need adjustment)
     (35, 68, 4, 0),   # jinwoo-stand - taller frames to include feet
     (53, 68, 8, 0),   # jinwoo-run - larger frames
@@ -44,154 +154,750 @@ frame_configs = [
     (45, 68, 5, 0)    # jinwoo-heavy-attack
 ]
 
-for (sheet_file, output_folder), (frame_width, frame_height, frames, x_offset) in zip(sprite_sheets, frame_configs):
-    os.makedirs(output_folder, exist_ok=True)
-    
-    sheet = Image.open(sheet_file).convert("RGBA")
-    sheet_width, sheet_height = sheet.size
-    
+# Per-frame x offsets for sheets whose frames are not evenly spaced.
+# Sheets that are not listed use the x_offset from frame_configs for every frame.
+frame_x_offsets = {
+    # Jump: frames 3 and 4 need more offset
+    "gojo_frames/jump/jump.png": [5, 5, 18, 18],
+    # Light attack: frame 4 needs some offset, frames 5 and 6 need more
+    "gojo_frames/light-attack/light_attack.png": [0, 0, 0, 10, 20, 20],
+    # Heavy attack: frames 1 and 2 shift left, frame 4 gets wider, frame 5 shifts over
+    "gojo_frames/heavy-attack/heavy_attack.png": [-10, -10, 0, 20, 25],
+    # Intro: frames 1-2 shift left, frames 3-4 get wider, frames 5-8 stay put
+    "gojo_frames/intro/intro.png": [-5, -10, 10, 15, 0, 0, 0, 0],
+    # Jin-Woo stand: every frame needs its own shift
+    "jin-woo_frames/stand/Untitled 4.png": [8, 15, 20, 30],
+    # Jin-Woo run: the frames are spaced unevenly across the sheet
+    "jin-woo_frames/run/run.png": [8, 37, 60, 95, 120, 145, 170, 207],
+    # Jin-Woo jump: frames 1, 2 and 3 need to be shifted right
+    "jin-woo_frames/jump/jump.png": [10, 15, 35, 0],
+    # Jin-Woo light attack: frames 1-4 need to be shifted right
+    "jin-woo_frames/light-attack/light-attack.png": [5, 10, 15, 20, 0, 0],
+}
+
+# How many pixels down the sheet to start cropping (0 when not listed).
+# Both Jin-Woo attack sheets are cropped 10px lower to shift him up in the frame.
+frame_y_offsets = {
+    "jin-woo_frames/light-attack/light-attack.png": 10,
+    "jin-woo_frames/heavy-attack/heavy_attack.png": 10,
+}
+
+
+# Sheets that keep their hand-tuned frame_configs geometry in --auto mode. On these,
+# find_frames() finds a different number of poses than the frames the games use (every
+# one a whole pose, so no AUTO_MIN_GAP / AUTO_MIN_PIXELS setting would merge them away).
+auto_overrides = {
+    "gojo_frames/intro/intro.png",                    # 10 poses, 8 frames
+    "gojo_frames/kick/kick.png",                      # 5 poses, 6 frames
+    "jin-woo_frames/stand/Untitled 4.png",            # 5 poses, 4 frames
+    "jin-woo_frames/jump/jump.png",                   # 6 poses, 4 frames
+    "jin-woo_frames/light-attack/light-attack.png",   # 7 poses, 6 frames
+    "jin-woo_frames/heavy-attack/heavy_attack.png",   # 6 poses, 5 frames
+}
+
+
+# Image names the games use, for output folders whose frame files are named differently.
+# Format: output folder -> name template filled in with the 1-based frame number.
+atlas_frame_names = {
+    "output_jinwoo_stand": "jinwoo_stand_{}",
+    "output_jinwoo_jump": "jinwoo_jump_{}",
+    "output_jinwoo_light_attack": "jinwoo_light_attack_{}",
+    "output_jinwoo_heavy_attack": "jinwoo-heavy-attack{}",
+}
+
+
+# Frames that were touched up by hand after slicing: the PNG the games ship in jjk_game/images
+# isn't what the sheet gives (some aren't even the same size), so anything that cuts frames
+# out of the sheets for the games has to leave these to the PNGs.
+# Format: output folder -> 1-based frame numbers, or None for every frame.
+hand_edited_frames = {
+    "output_intro": (1, 2, 3, 4),
+    "output_crouch": (3, 4),
+    "output_jinwoo_stand": None,
+    "output_jinwoo_jump": None,
+    "output_jinwoo_light_attack": None,
+    "output_jinwoo_heavy_attack": None,
+}
+
+
+def hand_edited(output_folder, index):
+    """Whether frame `index` (0-based) of a sheet was edited by hand after slicing (see hand_edited_frames)."""
+    folder = os.path.basename(os.path.normpath(output_folder))
+    if folder not in hand_edited_frames:
+        return False
+    numbers = hand_edited_frames[folder]
+    return numbers is None or index + 1 in numbers
+
+
+def variant_suffix(flip=False):
+    """File name suffix of a pre-baked variant: "_2x", or "_2x_flip" for the mirrored one."""
+    return f"_{VARIANT_SCALE}x" + ("_flip" if flip else "")
+
+
+def game_frame_name(output_folder, file_name):
+    """The image name the games use for a sliced frame, e.g. jinwoo_stand_2 for "Untitled 4_2.png"."""
+    stem = os.path.splitext(file_name)[0]
+    suffix = ""
+    for flip in (True, False):
+        if stem.endswith(variant_suffix(flip)):
+            stem, suffix = stem[:-len(variant_suffix(flip))], variant_suffix(flip)
+            break
+    template = atlas_frame_names.get(os.path.basename(os.path.normpath(output_folder)))
+    return (template.format(stem.rsplit("_", 1)[1]) if template else stem) + suffix
+
+
+def get_frame_config(sheet_file):
+    """Look up the (width, height, count, x_offset) tuple for a sheet in the tables above."""
+    for (known_sheet, _), config in zip(sprite_sheets, frame_configs):
+        if known_sheet == sheet_file:
+            return config
+    raise KeyError(f"No frame config for {sheet_file!r}; pass one to slice_sheet()")
+
+
+def frame_boxes(sheet_file, config):
+    """Return the (left, top, right, bottom) crop box of every frame in a sheet."""
+    frame_width, frame_height, frames, x_offset = config
+    x_offsets = frame_x_offsets.get(sheet_file, [x_offset] * frames)
+    y_offset = frame_y_offsets.get(sheet_file, 0)
+
+    boxes = []
     for i in range(frames):
-        # Apply different offsets for different frames
-        if sheet_file == "gojo_frames/jump/jump.png":
-            # Jump animation: frames 3 and 4 need more offset
-            if i >= 2:  # frames 3 and 4 (0-indexed: 2, 3)
-                frame_offset = 18  # more offset for frames 3 and 4
-            else:
-                frame_offset = 5   # less offset for frames 1 and 2
-        elif sheet_file == "gojo_frames/light-attack/light_attack.png":
-            # Light attack animation: frames 4, 5, and 6 need more offset
-            if i == 3:  # frame 4 (0-indexed: 3)
-                frame_offset = 10  # offset for frame 4
-            elif i >= 4:  # frames 5 and 6 (0-indexed: 4, 5)
-                frame_offset = 20  # more offset for frames 5 and 6
-            else:
-                frame_offset = 0   # no offset for frames 1, 2, and 3
-        elif sheet_file == "gojo_frames/heavy-attack/heavy_attack.png":
-            # Heavy attack animation: different offsets for different frames
-            if i == 0:  # frame 1 (0-indexed: 0)
-                frame_offset = -10  # more negative offset to make frame 1 less wide
-            elif i == 2:  # frame 3 (0-indexed: 2)
-                frame_offset = 0   # less offset for frame 3 to shift it to the right
-            elif i == 3:  # frame 4 (0-indexed: 3)
-                frame_offset = 20  # more offset for frame 4 to make it wider
-            elif i == 4:  # frame 5 (0-indexed: 4)
-                frame_offset = 25  # more offset for frame 5 to shift it to the left
-            else:
-                frame_offset = -10  # more negative offset to shift frame 2 further left
-        elif sheet_file == "gojo_frames/intro/intro.png":
-            # Intro animation: different offsets for different frames
-            if i == 0:  # frame 1 (0-indexed: 0)
-                frame_offset = -5  # negative offset to shift frame 1 left
-            elif i == 1:  # frame 2 (0-indexed: 1)
-                frame_offset = -10  # more negative offset to shift frame 2 further left
-            elif i == 2:  # frame 3 (0-indexed: 2)
-                frame_offset = 10  # positive offset to make frame 3 wider
-            elif i == 3:  # frame 4 (0-indexed: 3)
-                frame_offset = 15  # more positive offset to make frame 4 wider
-            else:
-                frame_offset = 0   # no offset for frames 5-8
-        elif sheet_file == "jin-woo_frames/stand/Untitled 4.png":
-            # Jin-Woo stand animation: different offsets for different frames
-            if i == 0:  # frame 1 (0-indexed: 0)
-                frame_offset = 8  # more negative offset to shift frame 1 further left
-            elif i == 2:
-                frame_offset = 20
-            elif i == 3:
-                frame_offset = 30
-            else:
-                frame_offset = 15  # negative offset to shift other frames left
-        elif sheet_file == "jin-woo_frames/run/run.png":
-            # Jin-Woo run animation: frame 1 needs to be shifted left
-            if i == 0:  # frame 1 (0-indexed: 0)
-                frame_offset = 8  # negative offset to shift frame 1 left
-            elif i == 1:
-                frame_offset = 37
-            elif i == 2:
-                frame_offset = 60
-            elif i == 3:
-                frame_offset = 95
-            elif i == 4:
-                frame_offset = 120
-            elif i == 5:
-                frame_offset = 145
-            elif i == 6:
-                frame_offset = 170
-            elif i == 7:
-                frame_offset = 207
-            else:
-                frame_offset = 0  # no offset for other frames
-        elif sheet_file == "jin-woo_frames/jump/jump.png":
-            # Jin-Woo jump animation: frame 1, 2, and 3 need to be shifted right
-            if i == 0:  # frame 1 (0-indexed: 0)
-                frame_offset = 10  # positive offset to shift frame 1 right
-            elif i == 1:  # frame 2 (0-indexed: 1)
-                frame_offset = 15  # positive offset to shift frame 2 right
-            elif i == 2:  # frame 3 (0-indexed: 2)
-                frame_offset = 35  # positive offset to shift frame 3 right
-            else:
-                frame_offset = 0  # no offset for other frames
-        elif sheet_file == "jin-woo_frames/light-attack/light-attack.png":
-            # Jin-Woo light attack animation: frame 1 needs to be shifted right
-            if i == 0:  # frame 1 (0-indexed: 0)
-                frame_offset = 5  # positive offset to shift frame 1 right
-            elif i == 1:
-                frame_offset = 10
-            elif i == 2:
-                frame_offset = 15
-            elif i == 3:
-                frame_offset = 20
-            else:
-                frame_offset = 0  # no offset for other frames
-            y_offset = 10  # shift Jin-Woo up in the frame
+        x_start = (i * frame_width) + x_offsets[i]
+        boxes.append((x_start, y_offset, x_start + frame_width, frame_height + y_offset))
+    return boxes
+
+
+def frame_filename(sheet_file, index):
+    """Name of the PNG for frame `index` (0-based), e.g. gojo-walk_3.png."""
+    # Extract just the filename without path and extension
+    filename = os.path.basename(sheet_file).split('.')[0]
+    return f"{filename}_{index + 1}.png"
+
+
+def key_sheet_in_place(sheet, boxes):
+    """Key every frame of a sheet without cutting it up. Returns (keyed_sheet, boxes).
+
+    Frames are keyed exactly like slice_sheet() keys them (each with its own
+    corner colors) and the background pixels are cleared in one copy of the
+    sheet. Boxes that hang over the edge of the sheet get a transparent
+    border, so the returned boxes (shifted to match) always fit inside the
+    returned sheet. This lets the games cut zero-copy views straight from it.
+    """
+    sheet = np.asarray(sheet, dtype=np.uint8)
+    height, width = sheet.shape[:2]
+    pad_left = max(0, -min(box[0] for box in boxes))
+    pad_top = max(0, -min(box[1] for box in boxes))
+    pad_right = max(0, max(box[2] for box in boxes) - width)
+    pad_bottom = max(0, max(box[3] for box in boxes) - height)
+    padded = np.pad(sheet, ((pad_top, pad_bottom), (pad_left, pad_right), (0, 0)))
+
+    shifted = [(left + pad_left, top + pad_top, right + pad_left, bottom + pad_top)
+               for left, top, right, bottom in boxes]
+    keyed = key_background(np.stack([padded[top:bottom, left:right]
+                                     for left, top, right, bottom in shifted]))
+    result = padded.copy()
+    for (left, top, right, bottom), frame in zip(shifted, keyed):
+        # Where frames overlap, a pixel that is background in either frame is cleared
+        result[top:bottom, left:right][(frame == 0).all(axis=-1)] = 0
+    return result, shifted
+
+
+def find_frames(mask, min_gap=AUTO_MIN_GAP, min_pixels=AUTO_MIN_PIXELS):
+    """Find the tight (left, top, right, bottom) box of every frame in a foreground mask.
+
+    Columns that contain any foreground pixel are grouped into runs; each run
+    is one frame. A row projection inside the run then trims the top and bottom.
+    """
+    columns = mask.any(axis=0).astype(np.int8)
+    # +1 where a run of occupied columns starts, -1 just after it ends
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], columns, [0]))))
+    runs = []
+    for left, right in edges.reshape(-1, 2):
+        if runs and left - runs[-1][1] < min_gap:
+            runs[-1][1] = right  # gap too small: same frame
         else:
-            frame_offset = x_offset
-        
-        x_start = (i * frame_width) + frame_offset
-        x_end = ((i+1) * frame_width) + frame_offset
-        
-        # Add vertical offset for Jin-Woo frames to crop lower
-        if 'y_offset' not in locals():
-            y_offset = 0
-            if sheet_file == "jin-woo_frames/stand/Untitled 4.png":
-                y_offset = 5  # Start cropping 5 pixels lower to include more feet
-            elif sheet_file == "jin-woo_frames/stand/Untitled 4_2.png":
-                y_offset = 5  # Start cropping 5 pixels lower to include more feet
-        
-        box = (x_start, y_offset, x_end, frame_height + y_offset)
-        frame = sheet.crop(box)
-        
-        # Convert background to transparent
-        # Get multiple background color samples for better detection
-        bg_colors = [
-            frame.getpixel((0, 0)),  # top-left
-            frame.getpixel((frame.width-1, 0)),  # top-right
-            frame.getpixel((0, frame.height-1)),  # bottom-left
-            frame.getpixel((frame.width-1, frame.height-1))  # bottom-right
-        ]
-        
-        # Create a new image with transparency
-        transparent_frame = Image.new("RGBA", frame.size, (0, 0, 0, 0))
-        
-        # Copy pixels, making background transparent
-        for x in range(frame.width):
-            for y in range(frame.height):
-                pixel = frame.getpixel((x, y))
-                # Check if pixel matches any of the background colors
-                is_background = False
-                for bg_color in bg_colors:
-                    if (abs(pixel[0] - bg_color[0]) < 25 and 
-                        abs(pixel[1] - bg_color[1]) < 25 and 
-                        abs(pixel[2] - bg_color[2]) < 25):
-                        is_background = True
-                        break
-                
-                if is_background:
-                    transparent_frame.putpixel((x, y), (0, 0, 0, 0))
-                else:
-                    transparent_frame.putpixel((x, y), pixel)
-        
-        # Extract just the filename without path and extension
-        filename = os.path.basename(sheet_file).split('.')[0]
-        transparent_frame.save(os.path.join(output_folder, f"{filename}_{i+1}.png"))
-
-print("Frames have been successfully sliced into individual PNGs!")
+            runs.append([left, right])
+
+    boxes = []
+    for left, right in runs:
+        strip = mask[:, left:right]
+        if strip.sum() < min_pixels:
+            continue
+        rows = np.flatnonzero(strip.any(axis=1))
+        boxes.append((int(left), int(rows[0]), int(right), int(rows[-1]) + 1))
+    return boxes
+
+
+def frame_pivot(mask, box, foot_rows=4):
+    """Pivot point of a frame, relative to its box: the middle of the feet, on the bottom edge."""
+    left, top, right, bottom = box
+    feet = np.flatnonzero(mask[max(top, bottom - foot_rows):bottom, left:right].any(axis=0))
+    if len(feet):
+        pivot_x = (feet[0] + feet[-1] + 1) / 2
+    else:
+        pivot_x = (right - left) / 2
+    return [float(pivot_x), bottom - top]
+
+
+def save_frame(frame, path, variants=False):
+    """Save one keyed (H, W, 4) frame. Returns the paths that were written.
+
+    With `variants`, also saves a VARIANT_SCALE x nearest-neighbour copy and a
+    mirrored copy of that, so the games can show them without transforming
+    anything at runtime.
+    """
+    image = Image.fromarray(frame, "RGBA")
+    image.save(path)
+    written = [path]
+    if variants:
+        stem, extension = os.path.splitext(path)
+        for suffix, variant in frame_variants(image):
+            variant.save(stem + suffix + extension)
+            written.append(stem + suffix + extension)
+    return written
+
+
+def frame_variants(image):
+    """The pre-baked copies of a frame, as (file name suffix, Image): scaled, then scaled and mirrored."""
+    scaled = image.resize((image.width * VARIANT_SCALE, image.height * VARIANT_SCALE), Image.Resampling.NEAREST)
+    return [(variant_suffix(), scaled),
+            (variant_suffix(True), scaled.transpose(Image.Transpose.FLIP_LEFT_RIGHT))]
+
+
+def slice_sheet_auto(sheet_file, output_folder, variants=False):
+    """Slice a sheet without a frame config by finding the frames automatically.
+
+    Keys the whole sheet in one pass, finds the frames with find_frames() and
+    saves each one cropped to its tight box. The boxes and pivots are written
+    to frames.json in the output folder; the frames the last run listed there
+    are removed first, so a run that finds fewer frames leaves none behind.
+    Returns the paths that were written.
+    """
+    sheet = np.asarray(Image.open(sheet_file).convert("RGBA"))
+    keyed = key_background(sheet)
+    mask = keyed[..., 3] > 0
+    boxes = find_frames(mask)
+
+    os.makedirs(output_folder, exist_ok=True)
+    index_path = os.path.join(output_folder, "frames.json")
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            old_frames = json.load(f)["frames"]
+        for frame in old_frames:
+            stem, extension = os.path.splitext(frame["file"])
+            for suffix in ("", variant_suffix(), variant_suffix(True)):
+                path = os.path.join(output_folder, stem + suffix + extension)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    written, index = [], []
+    for i, (left, top, right, bottom) in enumerate(boxes):
+        name = frame_filename(sheet_file, i)
+        written.extend(save_frame(keyed[top:bottom, left:right], os.path.join(output_folder, name), variants))
+        index.append({"file": name, "box": [left, top, right, bottom],
+                      "pivot": frame_pivot(mask, (left, top, right, bottom))})
+
+    with open(index_path, "w") as f:
+        json.dump({"sheet": sheet_file, "frames": index}, f, indent=2)
+    return written
+
+
+def slice_sheet(sheet_file, output_folder, config=None, frame_indices=None, variants=False):
+    """Crop, key and save the frames of one sheet. Returns the paths that were written.
+
+    `config` defaults to the sheet's entry in frame_configs; sheets that are not
+    in the table (or config=AUTO) are segmented automatically with
+    slice_sheet_auto(). Pass `frame_indices` to only write some of the frames
+    (the CLI uses this to split big sheets across workers). `variants` also
+    writes the pre-scaled and mirrored copies (see save_frame()).
+    """
+    if config is None:
+        try:
+            config = get_frame_config(sheet_file)
+        except KeyError:
+            config = AUTO
+    if config == AUTO:
+        return slice_sheet_auto(sheet_file, output_folder, variants)
+
+    boxes = frame_boxes(sheet_file, config)
+    if frame_indices is None:
+        frame_indices = range(len(boxes))
+    frame_indices = list(frame_indices)
+    if not frame_indices:
+        return []
+
+    os.makedirs(output_folder, exist_ok=True)
+    sheet = Image.open(sheet_file).convert("RGBA")
+
+    # Frames outside the sheet come back as transparent black, just like Image.crop
+    cropped = np.stack([np.asarray(sheet.crop(boxes[i])) for i in frame_indices])
+
+    # Convert background to transparent for all the frames in one pass
+    keyed_frames = key_background(cropped)
+
+    written = []
+    for i, keyed in zip(frame_indices, keyed_frames):
+        written.extend(save_frame(keyed, os.path.join(output_folder, frame_filename(sheet_file, i)), variants))
+    return written
+
+
+def _slice_task(task):
+    """Worker entry point for the process pool (must live at module level to be picklable)."""
+    sheet_file, output_folder, config, frame_indices, variants = task
+    return sheet_file, slice_sheet(sheet_file, output_folder, config, frame_indices, variants)
+
+
+def _plan_tasks(entries, jobs, variants=False):
+    """Split the work into (sheet, output, config, frame_indices, variants) tasks.
+
+    With more workers than sheets, each sheet's frames are split into chunks
+    so the spare workers have something to do.
+    """
+    chunks_per_sheet = max(1, math.ceil(jobs / max(1, len(entries))))
+    tasks = []
+    for sheet_file, output_folder, config in entries:
+        if config == AUTO:
+            # Auto segmentation needs the whole sheet, so it is one task
+            tasks.append((sheet_file, output_folder, config, None, variants))
+            continue
+        frames = config[2]
+        chunk_size = max(1, math.ceil(frames / chunks_per_sheet))
+        for start in range(0, frames, chunk_size):
+            tasks.append((sheet_file, output_folder, config,
+                          range(start, min(start + chunk_size, frames)), variants))
+    return tasks
+
+
+def select_sheets(only=None, auto=False):
+    """Return (sheet_file, output_folder, config) entries, optionally filtered.
+
+    `only` is a list of sheet paths, output folder names or sheet file names.
+    A path to a sheet that is not in the tables is added with config AUTO and
+    an output_<name> folder. With `auto`, every sheet except the ones in
+    auto_overrides is segmented automatically, into its output folder +
+    AUTO_FOLDER_SUFFIX (the tight boxes aren't the frames the games use).
+    """
+    entries = [(sheet_file, output_folder, config)
+               for (sheet_file, output_folder), config in zip(sprite_sheets, frame_configs)]
+    if only:
+        selected = []
+        for wanted in only:
+            matches = [entry for entry in entries
+                       if wanted in (entry[0], entry[1], os.path.basename(entry[0]))]
+            if not matches and os.path.isfile(wanted):
+                name = os.path.splitext(os.path.basename(wanted))[0].replace("-", "_").replace(" ", "_")
+                matches = [(wanted, f"output_{name}", AUTO)]
+            if not matches:
+                raise ValueError(f"No sprite sheet matches {wanted}")
+            selected.extend(entry for entry in matches if entry not in selected)
+        entries = selected
+    if auto:
+        # Sheets that aren't in the tables are already AUTO, in a folder of their own
+        entries = [(sheet_file, output_folder, config) if sheet_file in auto_overrides or config == AUTO
+                   else (sheet_file, output_folder + AUTO_FOLDER_SUFFIX, AUTO)
+                   for sheet_file, output_folder, config in entries]
+    return entries
+
+
+def slice_all(entries=None, jobs=1, progress=print, variants=False):
+    """Slice many sheets, spreading sheets and frames over `jobs` worker processes.
+
+    Returns a dict of sheet_file -> list of written paths. `progress` is called
+    with a short message each time a sheet finishes (pass None to stay quiet).
+    `variants` also writes the pre-scaled and mirrored copies of every frame.
+    """
+    if entries is None:
+        entries = select_sheets()
+    tasks = _plan_tasks(entries, jobs, variants)
+    remaining = {}
+    for task in tasks:
+        remaining[task[0]] = remaining.get(task[0], 0) + 1
+    outputs = {sheet_file: [] for sheet_file, _, _ in entries}
+    done = 0
+
+    def finished(sheet_file, written):
+        nonlocal done
+        outputs[sheet_file].extend(written)
+        remaining[sheet_file] -= 1
+        if remaining[sheet_file] == 0:
+            done += 1
+            if progress:
+                folder = os.path.dirname(written[0]) if written else sheet_file
+                progress(f"[{done:>2}/{len(entries)}] {folder}: {len(outputs[sheet_file])} frames")
+
+    if jobs <= 1:
+        for task in tasks:
+            finished(*_slice_task(task))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for future in as_completed([pool.submit(_slice_task, task) for task in tasks]):
+                finished(*future.result())
+
+    for sheet_file in outputs:
+        outputs[sheet_file].sort()
+    return outputs
+
+
+def load_manifest(path=CACHE_MANIFEST):
+    """Read the incremental build manifest (an empty one if it is missing or unreadable)."""
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(manifest, path=CACHE_MANIFEST):
+    """Write the manifest atomically so an interrupted build can't leave half a file."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def sheet_digest(sheet_file, record=None):
+    """SHA-256 of a sheet's bytes, reusing the hash in `record` if size and mtime match.
+
+    Returns (digest, stat_info). Skipping the read for untouched sheets is what
+    makes a no-op rebuild take milliseconds.
+    """
+    stat = os.stat(sheet_file)
+    stat_info = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if record and record.get("stat") == stat_info and record.get("sheet_hash"):
+        return record["sheet_hash"], stat_info
+
+    digest = hashlib.sha256()
+    with open(sheet_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest(), stat_info
+
+
+def input_fingerprint(sheet_file, config, sheet_hash, variants=False):
+    """Hash everything that decides an output folder's contents: pixels, geometry and keying."""
+    inputs = {
+        "version": CACHE_VERSION,
+        "sheet": sheet_file,
+        "sheet_hash": sheet_hash,
+        "tolerance": BG_TOLERANCE,
+        "variants": VARIANT_SCALE if variants else None,
+    }
+    if config == AUTO:
+        inputs["auto"] = [AUTO_MIN_GAP, AUTO_MIN_PIXELS]
+    else:
+        inputs["config"] = list(config)
+        inputs["boxes"] = frame_boxes(sheet_file, config)
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def split_by_cache(entries, manifest, variants=False):
+    """Split entries into (stale, fresh) using the manifest.
+
+    Also returns the new manifest records for every entry, keyed by output
+    folder, so the caller can save them (with the list of files that were
+    written) once the stale ones are rebuilt. An entry is fresh when its
+    fingerprint matches and all of the frames it wrote last time still exist.
+    """
+    stale, fresh, records = [], [], {}
+    for sheet_file, output_folder, config in entries:
+        record = manifest.get(output_folder)
+        sheet_hash, stat_info = sheet_digest(sheet_file, record)
+        fingerprint = input_fingerprint(sheet_file, config, sheet_hash, variants)
+        records[output_folder] = {
+            "sheet": sheet_file,
+            "sheet_hash": sheet_hash,
+            "stat": stat_info,
+            "fingerprint": fingerprint,
+        }
+
+        files = record.get("files") if record else None
+        up_to_date = (bool(files) and record.get("fingerprint") == fingerprint and
+                      all(os.path.exists(os.path.join(output_folder, name)) for name in files))
+        (fresh if up_to_date else stale).append((sheet_file, output_folder, config))
+    return stale, fresh, records
+
+
+def sheet_character(sheet_file):
+    """Which character a sheet belongs to, from its <character>_frames folder (gojo, jinwoo)."""
+    for part in os.path.normpath(sheet_file).split(os.sep):
+        if part.endswith("_frames"):
+            return part[:-len("_frames")].replace("-", "")
+    return "sprites"
+
+
+def pack_rects(sizes, padding=ATLAS_PADDING):
+    """Shelf-pack (width, height) sizes into one rectangle.
+
+    Frames are placed tallest first, left to right in rows ("shelves"); a new
+    shelf starts when the next frame doesn't fit. The atlas width is picked so
+    the result comes out roughly square. Returns ([(x, y), ...] in the same
+    order as `sizes`, (atlas_width, atlas_height)).
+    """
+    if not sizes:
+        return [], (0, 0)
+    padded = [(w + padding, h + padding) for w, h in sizes]
+    area = sum(w * h for w, h in padded)
+    atlas_width = max(max(w for w, _ in padded), math.ceil(math.sqrt(area * 1.1)))
+
+    positions = [None] * len(sizes)
+    x = y = shelf_height = used_width = 0
+    for i in sorted(range(len(sizes)), key=lambda i: (-padded[i][1], -padded[i][0])):
+        w, h = padded[i]
+        if x + w > atlas_width:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        positions[i] = (x, y)
+        x += w
+        used_width = max(used_width, x)
+        shelf_height = max(shelf_height, h)
+    return positions, (used_width, y + shelf_height)
+
+
+def build_atlas(frames, padding=ATLAS_PADDING):
+    """Pack frames into one image.
+
+    `frames` is a list of (name, RGBA Image, pivot) tuples. Returns the atlas
+    image and its index: name -> {"rect": [x, y, w, h], "pivot": [x, y]}.
+    """
+    positions, size = pack_rects([image.size for _, image, _ in frames], padding)
+    atlas = Image.new("RGBA", size, (0, 0, 0, 0))
+    index = {}
+    for (name, image, pivot), (x, y) in zip(frames, positions):
+        atlas.paste(image, (x, y))
+        index[name] = {"rect": [x, y, image.width, image.height], "pivot": pivot}
+    return atlas, index
+
+
+def frame_family(name):
+    """A frame name without its frame number: "jinwoo_stand_" for "jinwoo_stand_3"."""
+    return name.rstrip("0123456789")
+
+
+def atlas_frames(entries, images_dir=GAME_IMAGES, variants=False):
+    """Collect (character, name, image, pivot) for the game's frames of every entry's animation.
+
+    The frames come from the PNGs in images_dir, not from the slices: the
+    games use those, and several were edited by hand after slicing (all of
+    Jin-Woo's but the run, some to a different size, and a few of Gojo's).
+    An entry picks every PNG of its animation, including frames its sheet
+    doesn't have. With `variants`, each frame's pre-baked copies are added too.
+    """
+    # Which character each animation belongs to, e.g. "jinwoo_stand_" -> "jinwoo"
+    characters = {}
+    for sheet_file, output_folder, _ in entries:
+        name = game_frame_name(output_folder, frame_filename(sheet_file, 0))
+        characters[frame_family(name)] = sheet_character(sheet_file)
+
+    collected = []
+    for file_name in sorted(os.listdir(images_dir)):
+        name, extension = os.path.splitext(file_name)
+        if extension != ".png" or frame_family(name) not in characters:
+            continue
+        character = characters[frame_family(name)]
+        image = Image.open(os.path.join(images_dir, file_name)).convert("RGBA")
+        # Anchored like pgzero anchors the loose PNGs: bottom-center of the image
+        collected.append((character, name, image, [image.width / 2, image.height]))
+        if variants:
+            for suffix, variant in frame_variants(image):
+                collected.append((character, name + suffix, variant, [variant.width / 2, variant.height]))
+    return collected
+
+
+def write_atlases(entries, atlas_dir, images_dir=GAME_IMAGES, padding=ATLAS_PADDING, variants=False):
+    """Write <character>_atlas.png and <character>_atlas.json into atlas_dir.
+
+    Returns the paths of the atlas images.
+    """
+    by_character = {}
+    for character, name, image, pivot in atlas_frames(entries, images_dir, variants):
+        by_character.setdefault(character, []).append((name, image, pivot))
+
+    os.makedirs(atlas_dir, exist_ok=True)
+    written = []
+    for character, frames in sorted(by_character.items()):
+        atlas, index = build_atlas(frames, padding)
+        image_name = f"{character}_atlas.png"
+        atlas.save(os.path.join(atlas_dir, image_name))
+        with open(os.path.join(atlas_dir, f"{character}_atlas.json"), "w") as f:
+            json.dump({"image": image_name, "size": list(atlas.size), "frames": index}, f, indent=1)
+        written.append(os.path.join(atlas_dir, image_name))
+    return written
+
+
+def write_frame_store(path, frames):
+    """Write (name, RGBA Image, pivot) frames to a binary frame store (see STORE_MAGIC).
+
+    The pixels are stored uncompressed, so the games can memory-map the file
+    and build Surfaces without any PNG decoding.
+    """
+    table_end = STORE_HEADER.size + STORE_ENTRY.size * len(frames)
+    offset = -(-table_end // STORE_ALIGN) * STORE_ALIGN
+    entries, blobs = [], []
+    for name, image, pivot in frames:
+        encoded = name.encode("utf-8")
+        if len(encoded) > 32:
+            raise ValueError(f"Frame name {name!r} is longer than 32 bytes")
+        pixels = image.convert("RGBA").tobytes()
+        entries.append(STORE_ENTRY.pack(encoded, image.width, image.height,
+                                        float(pivot[0]), float(pivot[1]), offset))
+        blobs.append((offset, pixels))
+        offset = -(-(offset + len(pixels)) // STORE_ALIGN) * STORE_ALIGN
+
+    with open(path, "wb") as f:
+        f.write(STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, len(frames)))
+        f.write(b"".join(entries))
+        for blob_offset, pixels in blobs:
+            f.write(b"\0" * (blob_offset - f.tell()))
+            f.write(pixels)
+
+
+def write_frame_stores(entries, store_dir, images_dir=GAME_IMAGES, variants=False):
+    """Write <character>_frames.bin into store_dir for every character. Returns the paths."""
+    by_character = {}
+    for character, name, image, pivot in atlas_frames(entries, images_dir, variants):
+        by_character.setdefault(character, []).append((name, image, pivot))
+
+    os.makedirs(store_dir, exist_ok=True)
+    written = []
+    for character, frames in sorted(by_character.items()):
+        path = os.path.join(store_dir, f"{character}_frames.bin")
+        write_frame_store(path, frames)
+        written.append(path)
+    return written
+
+
+def build_palette(images, colors=INDEXED_COLORS):
+    """One shared palette for a list of RGBA frames, as an (N, 3) uint8 array.
+
+    If the frames use `colors` colors or fewer, the palette holds exactly those
+    colors. Otherwise the opaque pixels are octree-quantized down to `colors`
+    colors (median cut averages better, but loses small accents like eyes).
+    """
+    opaque = []
+    for image in images:
+        rgba = np.asarray(image)
+        opaque.append(rgba[rgba[..., 3] >= INDEXED_ALPHA_CUTOFF][:, :3])
+    opaque = np.concatenate(opaque) if opaque else np.zeros((0, 3), np.uint8)
+
+    unique = np.unique(opaque, axis=0)
+    if len(unique) <= colors:
+        return unique
+    strip = Image.fromarray(opaque[np.newaxis], "RGB")
+    quantized = strip.quantize(colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    return np.array(quantized.getpalette()[:colors * 3], dtype=np.uint8).reshape(-1, 3)
+
+
+def index_frame(image, palette):
+    """Turn an RGBA frame into a "P" mode image using `palette` (see build_palette()).
+
+    Palette index 0 is the transparent color; opaque pixels get the closest
+    palette color, at index 1 and up. Save it with transparency=0.
+    """
+    rgba = np.asarray(image)
+    # Match each distinct color once instead of every pixel
+    colors, inverse = np.unique(rgba[..., :3].reshape(-1, 3), axis=0, return_inverse=True)
+    distance = ((colors[:, np.newaxis].astype(np.int32) - palette[np.newaxis].astype(np.int32)) ** 2).sum(axis=2)
+    nearest = (distance.argmin(axis=1) + 1).astype(np.uint8)
+    indices = nearest[inverse.reshape(-1)].reshape(rgba.shape[:2])
+    indices[rgba[..., 3] < INDEXED_ALPHA_CUTOFF] = 0
+
+    indexed = Image.fromarray(indices, "P")
+    indexed.putpalette(bytes(3) + palette.tobytes())
+    return indexed
+
+
+def write_indexed_frames(entries, indexed_dir, images_dir=GAME_IMAGES, variants=False):
+    """Write every frame as an 8-bit PNG into indexed_dir/<character>_indexed/<frame name>.png.
+
+    All of a character's frames share one palette. Returns a list of
+    (folder, frame count, palette size).
+    """
+    by_character = {}
+    for character, name, image, _ in atlas_frames(entries, images_dir, variants):
+        by_character.setdefault(character, []).append((name, image))
+
+    written = []
+    for character, frames in sorted(by_character.items()):
+        folder = os.path.join(indexed_dir, f"{character}_indexed")
+        os.makedirs(folder, exist_ok=True)
+        palette = build_palette([image for _, image in frames])
+        for name, image in frames:
+            index_frame(image, palette).save(os.path.join(folder, name + ".png"), transparency=0, optimize=True)
+        written.append((folder, len(frames), len(palette)))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slice sprite sheets into transparent PNG frames.")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: one per CPU core)")
+    parser.add_argument("--only", action="append", metavar="SHEET",
+                        help="only slice this sheet (path, file name or output folder); can be repeated")
+    parser.add_argument("--quiet", "-q", action="store_true", help="don't print progress")
+    parser.add_argument("--auto", action="store_true",
+                        help="find frame boxes from the background instead of frame_configs "
+                             "(except for sheets in auto_overrides), into output_*_auto folders; "
+                             "not a drop-in replacement for the hand-tuned slices the games use")
+    parser.add_argument("--variants", action="store_true",
+                        help=f"also write {VARIANT_SCALE}x and {VARIANT_SCALE}x-mirrored copies of every frame "
+                             f"(<frame>{variant_suffix()}.png, <frame>{variant_suffix(True)}.png)")
+    parser.add_argument("--incremental", "-i", action="store_true",
+                        help="skip sheets whose inputs haven't changed since the last build")
+    parser.add_argument("--manifest", default=CACHE_MANIFEST,
+                        help=f"where to keep the build manifest (default: {CACHE_MANIFEST})")
+    parser.add_argument("--atlas", metavar="DIR",
+                        help="also pack each character's frames into DIR/<character>_atlas.png + .json")
+    parser.add_argument("--images", metavar="DIR", default=GAME_IMAGES,
+                        help=f"the game's frame PNGs that --atlas, --store and --indexed pack (default: {GAME_IMAGES})")
+    parser.add_argument("--store", metavar="DIR",
+                        help="also write each character's frames as raw RGBA to DIR/<character>_frames.bin")
+    parser.add_argument("--indexed", metavar="DIR",
+                        help="also write each character's frames as 8-bit palette PNGs to DIR/<character>_indexed/")
+    args = parser.parse_args(argv)
+
+    try:
+        entries = select_sheets(args.only, auto=args.auto)
+        # --atlas, --store and --indexed pack the game's PNGs, named after the hand-tuned slices
+        packed = select_sheets(args.only)
+    except ValueError as error:
+        parser.error(str(error))
+
+    start = time.perf_counter()
+    manifest = load_manifest(args.manifest)
+    stale, fresh, records = split_by_cache(entries, manifest, args.variants)
+    if not args.incremental:
+        stale, fresh = entries, []
+    else:
+        print(f"Cache: {len(fresh)} hits, {len(stale)} misses "
+              f"(checked in {(time.perf_counter() - start) * 1000:.1f} ms)")
+
+    outputs = {}
+    if stale:
+        outputs = slice_all(stale, jobs=max(1, args.jobs), progress=None if args.quiet else print,
+                            variants=args.variants)
+    # Record every folder we just built (and keep the records of the ones we skipped)
+    for sheet_file, output_folder, _ in stale:
+        files = sorted(os.path.basename(path) for path in outputs[sheet_file])
+        manifest[output_folder] = dict(records[output_folder], files=files)
+    save_manifest(manifest, args.manifest)
+
+    if stale:
+        total = sum(len(paths) for paths in outputs.values())
+        print(f"Frames have been successfully sliced into individual PNGs! "
+              f"({total} frames from {len(outputs)} sheets in {time.perf_counter() - start:.2f}s)")
+    else:
+        print("Everything is up to date, nothing to slice.")
+
+    if args.atlas:
+        for path in write_atlases(packed, args.atlas, args.images, variants=args.variants):
+            print(f"Packed atlas {path}")
+    if args.store:
+        for path in write_frame_stores(packed, args.store, args.images, args.variants):
+            print(f"Wrote frame store {path}")
+    if args.indexed:
+        for folder, count, colors in write_indexed_frames(packed, args.indexed, args.images, args.variants):
+            print(f"Wrote {count} indexed frames to {folder} ({colors} colors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,17 @@
 # Flappy Bird Clone using Pygame Zero + pgzhelper
 # Run with: pgzrun main.py
 
+import os
 import random
+import sys
 from pgzhelper import *  # Provides sprite animation & rotation helpers
 
+# The text cache lives in the folder above this game's folder (shared by all the games)
+from pgzero import loaders
+sys.path.append(os.path.dirname(loaders.root))
+from frame_profiler import FrameProfiler  # F3 shows how long each part of a frame takes
+from text_cache import text_cache  # Only renders text that has changed
+
 # -----------------------------
 # Game Settings
 # -----------------------------
@@ -28,6 +36,10 @@ pipes = []      # Holds tuples of (top_pipe, bottom_pipe)
 score = 0
 game_over = False
 
+# Frame timings, saved to frame_profile.csv when the game closes (flapping is handled
+# in on_key_down, between frames, so the input phase stays at 0)
+profiler = FrameProfiler(enabled=False, csv_path="frame_profile.csv")
+
 # -----------------------------
 # Sound Effects
 # -----------------------------
@@ -66,18 +78,25 @@ def draw():
         bottom.draw()
 
     bird.draw()
+    profiler.mark("draw")
 
     # Score
-    screen.draw.text(f"Score: {score}", midtop=(WIDTH//2, 10), fontsize=40, color="white")
+    text_cache.draw(screen, f"Score: {score}", midtop=(WIDTH//2, 10), fontsize=40, color="white")
 
     # Game Over message
     if game_over:
-        screen.draw.text("GAME OVER!", center=(WIDTH//2, HEIGHT//2), fontsize=60, color="red")
-        screen.draw.text("Press SPACE to restart", center=(WIDTH//2, HEIGHT//2 + 60), fontsize=30, color="yellow")
+        text_cache.draw(screen, "GAME OVER!", center=(WIDTH//2, HEIGHT//2), fontsize=60, color="red")
+        text_cache.draw(screen, "Press SPACE to restart", center=(WIDTH//2, HEIGHT//2 + 60), fontsize=30, color="yellow")
+    profiler.mark("text")
+
+    # Finish timing this frame, then show the timings (when F3 is on)
+    profiler.end_frame()
+    profiler.draw(screen, (10, 60))
 
 def update():
     """Update game logic each frame."""
     global game_over, score
+    profiler.start_frame()
 
     if game_over:
         return
@@ -85,8 +104,10 @@ def update():
     # Bird gravity and animation
     bird.vy += GRAVITY
     bird.y += bird.vy
+    profiler.mark("physics")
     bird.next_image()  # Animate flapping
     bird.angle = max(-30, min(60, -bird.vy * 5))  # Tilt up when flapping, down when falling
+    profiler.mark("animation")
 
     # Move pipes
     for top, bottom in pipes:
@@ -107,10 +128,13 @@ def update():
             sounds.sfx_die.play()  # Play die sound
             game_over = True
             break
+    profiler.mark("physics")
 
 def on_key_down(key):
     """Handle key presses for flap and restart."""
     global game_over
+    if key == keys.F3:
+        profiler.toggle()
     if key == keys.SPACE:
         if game_over:
             reset_game()
@@ -0,0 +1,162 @@
+"""
+Shows where each frame's time goes, for all the games in this folder.
+
+A game calls start_frame() at the top of update(), mark("phase") each time it
+finishes a piece of work, and end_frame() at the end of draw(). Each mark
+adds the time since the previous one to that phase:
+
+    input      reading the keyboard
+    physics    moving things and checking collisions
+    animation  picking the frame to show
+    draw       drawing the background and the sprites
+    text       drawing the text
+
+(a game that has no work for a phase just leaves it at 0). The last FRAMES
+frames are kept in a ring buffer, and the overlay shows the 50th, 95th and
+99th percentile of the time a frame took, plus the average of each phase:
+
+    from frame_profiler import FrameProfiler
+    profiler = FrameProfiler(enabled=False, csv_path="frame_profile.csv")
+    ...
+    profiler.draw(screen)   # the overlay, while the profiler is on
+
+F3 (see each game's on_key_down) turns it on and off. While it's off, every
+call returns straight away, so it costs a few method calls a frame. When the
+game closes, the frames it recorded are written to csv_path, one row per
+frame, for a spreadsheet.
+"""
+
+import atexit
+import time
+from array import array
+
+from text_cache import text_cache
+
+PHASES = ("input", "physics", "animation", "draw", "text")
+
+# Columns of a frame: time since the last frame started, time spent in
+# update() + draw(), then one per phase (all in seconds)
+COLUMNS = ("interval", "work") + PHASES
+
+# How many frames the ring buffer keeps (a minute at 60 frames a second)
+FRAMES = 3600
+
+# The overlay's numbers are worked out again every this many frames
+OVERLAY_REFRESH = 30
+
+
+def percentile(sorted_values, percent):
+    """The value `percent`% of the way through a sorted list."""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, frames=FRAMES, csv_path=None):
+        self.enabled = enabled
+        self.frames = frames
+        # The ring buffer: row i holds frame number i % frames
+        self._rows = array("d", bytes(8 * frames * len(COLUMNS)))
+        self._current = [0.0] * len(COLUMNS)
+        self._phase_column = {phase: COLUMNS.index(phase) for phase in PHASES}
+        # How many frames were recorded in all (the buffer keeps the last `frames` of them)
+        self.count = 0
+        self._frame_start = None
+        self._lap = 0.0
+        self._overlay = []
+        self.csv_path = csv_path
+        if csv_path:
+            atexit.register(self.save_csv)
+
+    def toggle(self):
+        """Turn the profiler (and its overlay) on or off."""
+        self.enabled = not self.enabled
+        # The time while it was off doesn't belong to the next frame
+        self._frame_start = None
+
+    def start_frame(self):
+        """Call at the top of update()."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        current = self._current
+        current[0] = now - self._frame_start if self._frame_start is not None else 0.0
+        for column in range(1, len(current)):
+            current[column] = 0.0
+        self._frame_start = self._lap = now
+
+    def mark(self, phase):
+        """Add the time since the last mark (or the start of the frame) to `phase`."""
+        if not self.enabled or self._frame_start is None:
+            return
+        now = time.perf_counter()
+        self._current[self._phase_column[phase]] += now - self._lap
+        self._lap = now
+
+    def end_frame(self):
+        """Call at the end of draw(), before drawing the overlay."""
+        if not self.enabled or self._frame_start is None:
+            return
+        current = self._current
+        current[1] = time.perf_counter() - self._frame_start
+        start = (self.count % self.frames) * len(COLUMNS)
+        self._rows[start:start + len(COLUMNS)] = array("d", current)
+        self.count += 1
+        if self.count % OVERLAY_REFRESH == 1:
+            self._overlay = self.summary_lines()
+
+    def recorded(self):
+        """The frames in the ring buffer, oldest first, as tuples of COLUMNS."""
+        kept = min(self.count, self.frames)
+        first = self.count - kept
+        width = len(COLUMNS)
+        return [tuple(self._rows[(frame % self.frames) * width:(frame % self.frames + 1) * width])
+                for frame in range(first, self.count)]
+
+    def stats(self):
+        """Percentiles of the frame work time and the average of each phase, in milliseconds."""
+        kept = min(self.count, self.frames)
+        if not kept:
+            return {}
+        # Every column is one strided slice of the buffer (the order of the frames doesn't matter here)
+        width = len(COLUMNS)
+        rows = self._rows[:kept * width]
+        work = sorted(rows[1::width])
+        stats = {"frames": kept}
+        for name, percent in (("p50", 50), ("p95", 95), ("p99", 99), ("worst", 100)):
+            stats[name] = percentile(work, percent) * 1000
+        for phase in PHASES:
+            stats[phase] = sum(rows[self._phase_column[phase]::width]) * 1000 / kept
+        return stats
+
+    def summary_lines(self):
+        """The overlay's text."""
+        stats = self.stats()
+        if not stats:
+            return []
+        averages = [f"{phase} {stats[phase]:.2f}" for phase in PHASES]
+        return [f"Frame p50 {stats['p50']:.2f}  p95 {stats['p95']:.2f}  p99 {stats['p99']:.2f} ms",
+                "  ".join(averages[:3]),
+                "  ".join(averages[3:]) + f" ms (average of {stats['frames']})"]
+
+    def draw(self, screen, pos=(10, 10)):
+        """Draw the overlay while the profiler is on. Returns the rectangles it drew on."""
+        if not self.enabled:
+            return []
+        x, y = pos
+        drawn = []
+        for i, line in enumerate(self._overlay):
+            drawn.append(text_cache.draw(screen, line, (x, y + i * 18), color="white", background="black",
+                                         fontsize=16))
+        return drawn
+
+    def save_csv(self, path=None):
+        """Write the recorded frames (in milliseconds) to `path` (csv_path by default)."""
+        path = path or self.csv_path
+        frames = self.recorded()
+        if not path or not frames:
+            return
+        with open(path, "w") as f:
+            f.write("frame," + ",".join(f"{column}_ms" for column in COLUMNS) + "\n")
+            for number, frame in enumerate(frames, self.count - len(frames)):
+                f.write(f"{number}," + ",".join(f"{seconds * 1000:.4f}" for seconds in frame) + "\n")
+        print(f"Saved the timings of {len(frames)} frames to {path}")
@@ -0,0 +1,124 @@
+"""
+Animation tables for the fighting game.
+
+Every animation state has an integer ID (STAND, WALK, JUMP, ...). Each
+character has one table: a tuple with one Animation per state ID, or None
+for moves the character doesn't have frames for. The tables are built once
+when this module is imported and shared by every Fighter, and they are
+immutable (tuples all the way down).
+
+An Animation already knows which image to show on every tick of its state,
+so a Fighter only has to count ticks:
+
+    animation = GOJO_ANIMATIONS[KICK]
+    actor_image = animation.frame(ticks_since_the_kick_started)
+
+Adding a move is one more state ID and one more entry in the tables.
+"""
+
+from collections import namedtuple
+
+# Animation state IDs (also the index into a character's table)
+STAND, WALK, JUMP, LIGHT_ATTACK, HEAVY_ATTACK, KICK, DASH, INTRO = range(8)
+STATE_NAMES = ("stand", "walk", "jump", "light_attack", "heavy_attack", "kick", "dash", "intro")
+
+# Game logic ticks per second. Everything below is in ticks, worked out from
+# per-second values, so changing the rate doesn't change how the game plays.
+TICK_RATE = 120
+
+# Looping animations show 12 frames a second
+TICKS_PER_FRAME = TICK_RATE // 12
+
+# Jump physics the jump animation follows (must match Fighter):
+# take off at 900 pixels/second upward, gravity pulls 2880 pixels/second down each second
+JUMP_SPEED = -900 / TICK_RATE
+GRAVITY = 2880 / TICK_RATE ** 2
+
+
+def ticks(seconds):
+    """How many ticks `seconds` lasts."""
+    return round(seconds * TICK_RATE)
+
+
+class Animation(namedtuple("Animation", "frames by_tick duration loop")):
+    """One animation state.
+
+    frames:   the distinct images, in order (used to pre-bake them)
+    by_tick:  the image to show on each tick of the state
+    duration: ticks until the state is over, or None if it lasts until
+              something else ends it (a loop, or a jump landing)
+    loop:     whether by_tick repeats
+    """
+    __slots__ = ()
+
+    def frame(self, tick):
+        """Image to show `tick` ticks after the state started."""
+        if self.loop:
+            return self.by_tick[tick % len(self.by_tick)]
+        return self.by_tick[min(tick, len(self.by_tick) - 1)]
+
+
+def frame_names(pattern, count):
+    """("kick_1", "kick_2", ...) for pattern "kick_{}"."""
+    return tuple(pattern.format(i) for i in range(1, count + 1))
+
+
+def looping(frames, ticks_per_frame=TICKS_PER_FRAME):
+    """Cycle through the frames, ticks_per_frame ticks each."""
+    frames = tuple(frames)
+    by_tick = tuple(frames[tick // ticks_per_frame] for tick in range(len(frames) * ticks_per_frame))
+    return Animation(frames, by_tick, None, True)
+
+
+def timed(frames, seconds):
+    """Play the frames once, spread evenly over `seconds`."""
+    duration = ticks(seconds)
+    frames = tuple(frames)
+    count = len(frames)
+    by_tick = tuple(frames[min(count - 1, int(tick / duration * count))] for tick in range(duration))
+    return Animation(frames, by_tick, duration, False)
+
+
+def jump_arc(frames, jump_speed=JUMP_SPEED, gravity=GRAVITY):
+    """Follow the rise of a jump: the frame moves on as the upward speed runs out.
+
+    After `tick` ticks in the air the speed has gone from jump_speed to
+    jump_speed + tick * gravity; the last frame is held from there on.
+    """
+    frames = tuple(frames)
+    count = len(frames)
+    by_tick = []
+    tick = 0
+    while not by_tick or by_tick[-1] != frames[-1]:
+        progress = tick * gravity / -jump_speed
+        by_tick.append(frames[min(count - 1, int(progress * count))])
+        tick += 1
+    return Animation(frames, tuple(by_tick), None, False)
+
+
+def table_frames(table):
+    """Every image a character's table uses."""
+    return [frame for animation in table if animation for frame in animation.frames]
+
+
+GOJO_ANIMATIONS = (
+    looping(frame_names("gojo-stand_{}", 4)),        # STAND
+    looping(frame_names("gojo-walk_{}", 8)),         # WALK
+    jump_arc(frame_names("jump_{}", 4)),             # JUMP
+    timed(frame_names("light_attack_{}", 6), 0.5),   # LIGHT_ATTACK
+    timed(frame_names("heavy_attack_{}", 5), 0.5),   # HEAVY_ATTACK
+    timed(frame_names("kick_{}", 6), 0.5),           # KICK
+    timed(frame_names("gojo-dash_{}", 1), 0.25),     # DASH
+    timed(frame_names("intro_{}", 8), 1.0),          # INTRO
+)
+
+JINWOO_ANIMATIONS = (
+    looping(frame_names("jinwoo_stand_{}", 4)),               # STAND
+    looping(frame_names("run_{}", 8)),                        # WALK
+    jump_arc(frame_names("jinwoo_jump_{}", 4)),               # JUMP
+    timed(frame_names("jinwoo_light_attack_{}", 6), 0.5),     # LIGHT_ATTACK
+    timed(frame_names("jinwoo-heavy-attack{}", 5), 0.5),      # HEAVY_ATTACK
+    None,                                                     # KICK
+    None,                                                     # DASH
+    None,                                                     # INTRO
+)
@@ -0,0 +1,350 @@
+"""
+A computer opponent for the fighting game, thinking on its own thread.
+
+CpuInput is an input provider like KeyboardInput: the game polls it once a
+tick for the buttons its fighter holds. The thinking happens on a worker
+thread, so the game never waits for it:
+
+    game thread                           worker thread
+    poll(): put the match state  ──────▶  take the newest state
+            in `observations`             try each button on a copy of the
+                                          match for LOOKAHEAD_SECONDS, until
+                                          the time budget is used up
+            take the newest      ◀──────  put the best buttons in `decisions`
+            buttons, if any
+
+Both queues are deques holding only their newest item. Appending to and
+popping from a deque are single, atomic operations in CPython, so neither
+side ever takes a lock or waits for the other. poll() just hands back
+whatever was decided last (a decision is a few ticks old by then, like a
+human's reaction time).
+
+Each decision plays out each button it could hold (standing still,
+walking or one of its moves) against an opponent that does nothing and
+one that attacks, and keeps the one with the best worst case. Every
+CHECK_EVERY_TICKS simulated ticks it lets the game's thread run, and
+stops before going over `budget` seconds of its own work, going with the
+best so far. Time spent waiting for the game's thread doesn't count (see
+budget_clock()). stats() has the numbers: how long decisions take against
+the budget, how long poll() takes on the game's thread, and how many
+frames were dropped while it played.
+
+    python jjk_game/cpu_player.py --seconds 10 --budget 2
+
+plays Gojo (random buttons) against the CPU Jin-Woo in real time at 60
+frames a second, with some pretend drawing work each frame, and reports
+dropped frames with and without the CPU player.
+"""
+
+import argparse
+import threading
+import time
+from collections import deque
+
+from animations import TICK_RATE
+from fight_sim import FRAME_BOXES, Match, RandomInput, INPUT_LEFT, INPUT_RIGHT, INPUT_LIGHT, INPUT_HEAVY, INPUT_KICK, MOVE_BUTTONS
+
+# How long the CPU may think about each decision (seconds)
+THINK_BUDGET = 0.002
+# How many decisions it makes a second (it holds its buttons in between)
+DECISIONS_PER_SECOND = 20
+# How far ahead each choice is played out
+LOOKAHEAD_SECONDS = 0.3
+LOOKAHEAD_TICKS = round(LOOKAHEAD_SECONDS * TICK_RATE)
+# How many ticks it simulates before checking the budget and giving the game's thread a turn
+CHECK_EVERY_TICKS = 12
+
+# What the opponent is assumed to do while a choice is played out
+OPPONENT_GUESSES = (0, INPUT_LIGHT)
+
+# A frame that takes more than this long (seconds) counts as dropped: at 60 frames a second,
+# the screen showed the one before it twice
+DROPPED_FRAME_SECONDS = 1.5 / 60
+
+# Each hit point of damage dealt is worth this much more than one taken
+AGGRESSION = 1.5
+
+# A clock that ticks in bigger steps than this (seconds) is too coarse to measure the budget with
+FINE_CLOCK_STEP = 0.0001
+
+# How many timings stats() looks at
+TIMING_SAMPLES = 600
+
+
+def clock_step(clock):
+    """The smallest step `clock` was seen to move by, over a few readings."""
+    steps = []
+    while len(steps) < 3:
+        start = now = clock()
+        while now == start:
+            now = clock()
+        steps.append(now - start)
+    return min(steps)
+
+
+def budget_clock():
+    """The clock to measure a thread's thinking time with, and whether it counts only that thread's work.
+
+    time.thread_time() counts only the calling thread's own work, so the time it spends waiting for the
+    GIL while the game's thread runs is left out. On Windows it only ticks every 15.6 ms, though, so a
+    2 ms budget would never run out. There it's time.perf_counter() instead, minus the time spent in
+    sleep(0) letting the game run; a wait for the GIL in the middle of simulating still counts there.
+    """
+    if clock_step(time.thread_time) <= FINE_CLOCK_STEP:
+        return time.thread_time, True
+    return time.perf_counter, False
+
+
+def percentiles(samples):
+    """Mean, 95th percentile and worst of a list of seconds, in milliseconds."""
+    if not samples:
+        return {"mean": 0.0, "p95": 0.0, "worst": 0.0}
+    ms = sorted(seconds * 1000 for seconds in samples)
+    return {"mean": sum(ms) / len(ms), "p95": ms[min(len(ms) - 1, int(len(ms) * 0.95))], "worst": ms[-1]}
+
+
+class CpuInput:
+    """Buttons for fighter number `player` (0 or 1), decided on a worker thread."""
+
+    def __init__(self, player=1, budget=THINK_BUDGET, decisions_per_second=DECISIONS_PER_SECOND):
+        self.player = player
+        self.budget = budget
+        self.interval = 1 / decisions_per_second
+        self.match = None
+        self.buttons = 0
+        # game -> worker: the newest match state; worker -> game: the newest decision
+        self.observations = deque(maxlen=1)
+        self.decisions = deque(maxlen=1)
+        self.running = False
+        self.thread = None
+        # The decision being made (worker thread): the budget_clock() and when it started by it,
+        # time spent letting the game run, and when the current stretch of simulating started and
+        # the longest one took (in thinking() seconds)
+        self.clock, self.own_time = time.perf_counter, False
+        self.started = 0.0
+        self.waited = 0.0
+        self.since = 0.0
+        self.longest = 0.0
+
+        # Numbers for stats(): worker thread
+        self.decision_count = 0
+        self.over_budget = 0
+        self.think_times = deque(maxlen=TIMING_SAMPLES)
+        self.wait_times = deque(maxlen=TIMING_SAMPLES)
+        self.choices_tried = deque(maxlen=TIMING_SAMPLES)
+        # ... and game thread
+        self.poll_times = deque(maxlen=TIMING_SAMPLES)
+        self.frames = 0
+        self.dropped_frames = 0
+        self.worst_frame = 0.0
+
+    def start(self, match):
+        """Start thinking about `match` (the one the game is playing)."""
+        self.match = match
+        self.running = True
+        # A daemon thread, so it never keeps the game from closing
+        self.thread = threading.Thread(target=self.think_loop, name="cpu-player", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+
+    def poll(self):
+        start = time.perf_counter()
+        if self.match:
+            # The match state is a tuple of numbers, so the worker can keep it as it is
+            self.observations.append(self.match.save())
+        try:
+            self.buttons = self.decisions.popleft()
+        except IndexError:
+            pass  # Nothing new: keep holding the same buttons
+        self.poll_times.append(time.perf_counter() - start)
+        return self.buttons
+
+    def record_frame(self, seconds):
+        """Tell it how long a frame took (the game's dt), to count dropped frames."""
+        self.frames += 1
+        self.worst_frame = max(self.worst_frame, seconds)
+        if is_dropped(seconds):
+            self.dropped_frames += 1
+
+    def think_loop(self):
+        # The worker thread: one decision every `interval` seconds, about the newest state
+        self.clock, self.own_time = budget_clock()
+        scratch = Match(None, None)
+        choices = self.choices_for(scratch.fighters[self.player])
+        best = 0
+        seen = None
+        next_decision = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            if now < next_decision:
+                time.sleep(next_decision - now)
+                continue
+            next_decision += self.interval
+            try:
+                state = self.observations[-1]
+            except IndexError:
+                continue
+            if state is seen:
+                continue
+            seen = state
+            started_at = time.perf_counter()
+            best, tried = self.decide(scratch, state, choices, best)
+            self.decisions.append(best)
+            elapsed = self.thinking()
+            self.decision_count += 1
+            self.think_times.append(elapsed)
+            self.wait_times.append(time.perf_counter() - started_at)
+            self.choices_tried.append(tried)
+            if elapsed > self.budget:
+                self.over_budget += 1
+
+    def choices_for(self, fighter):
+        # Standing still, walking either way, and every move the character has frames for
+        choices = [0, INPUT_LEFT, INPUT_RIGHT]
+        choices.extend(button for state, button in MOVE_BUTTONS if fighter.animations[state])
+        return choices
+
+    def decide(self, scratch, state, choices, previous):
+        """The best of `choices` from match state `state`, within the budget. Returns (buttons, choices tried)."""
+        self.started, self.waited, self.since, self.longest = self.clock(), 0.0, 0.0, 0.0
+        # Try last time's choice first, then attacks, so a short budget still has a good answer
+        order = sorted(choices, key=lambda buttons: (buttons != previous,
+                                                     not buttons & (INPUT_LIGHT | INPUT_HEAVY | INPUT_KICK)))
+        best, best_score, tried = previous, None, 0
+        for buttons in order:
+            worst = None
+            for guess in OPPONENT_GUESSES:
+                score = self.play_out(scratch, state, buttons, guess)
+                if score is None:
+                    return best, tried  # Out of time: this choice wasn't played out in full
+                worst = score if worst is None else min(worst, score)
+            tried += 1
+            if best_score is None or worst > best_score:
+                best, best_score = buttons, worst
+        return best, tried
+
+    def thinking(self):
+        """Seconds the current decision has spent thinking (not counting the game's turns)."""
+        if self.own_time:
+            return self.clock() - self.started
+        return self.clock() - self.started - self.waited
+
+    def take_turns(self):
+        """Let the game's thread run, then say whether another stretch of simulating fits in the budget."""
+        before = self.clock()
+        # This is pure Python, so it holds the GIL: offer it to the game's thread now, rather
+        # than that thread waiting up to sys.getswitchinterval() (5 ms) to take it
+        time.sleep(0)
+        self.waited += self.clock() - before
+        now = self.thinking()
+        self.longest = max(self.longest, now - self.since)
+        self.since = now
+        return now + self.longest <= self.budget
+
+    def play_out(self, scratch, state, buttons, guess):
+        # How good holding `buttons` for LOOKAHEAD_TICKS turns out, if the opponent holds `guess`
+        # (None if the budget ran out first)
+        scratch.restore(state)
+        me, them = scratch.fighters[self.player], scratch.fighters[1 - self.player]
+        my_health, their_health = me.health, them.health
+        for tick in range(LOOKAHEAD_TICKS):
+            if tick % CHECK_EVERY_TICKS == 0 and not self.take_turns():
+                return None
+            if self.player == 0:
+                scratch.step(buttons, guess)
+            else:
+                scratch.step(guess, buttons)
+        dealt = their_health - them.health
+        taken = my_health - me.health
+        # Otherwise, the closer the better (nothing can hit from across the arena)
+        return dealt * AGGRESSION - taken - abs(me.x - them.x) / 1000
+
+    def stats(self):
+        """How long thinking and polling take (ms), and how the frames went while it played.
+
+        "think" is the time per decision that counts against the budget (see budget_clock()), "think_wall"
+        the time from starting a decision to publishing it (including the time the game's thread ran).
+        """
+        tried = list(self.choices_tried)
+        return {"decisions": self.decision_count, "budget": self.budget * 1000, "over_budget": self.over_budget,
+                "think": percentiles(list(self.think_times)),
+                "think_wall": percentiles(list(self.wait_times)), "poll": percentiles(list(self.poll_times)),
+                "choices_tried": sum(tried) / len(tried) if tried else 0.0,
+                "frames": self.frames, "dropped_frames": self.dropped_frames, "worst_frame": self.worst_frame * 1000}
+
+
+def is_dropped(seconds):
+    """Whether a frame that took `seconds` counts as dropped."""
+    return seconds > DROPPED_FRAME_SECONDS
+
+
+def stats_line(stats):
+    """One line about CpuInput.stats(), for printing or the screen."""
+    return (f"CPU: {stats['decisions']} decisions, thinking {stats['think']['mean']:.2f} ms "
+            f"(worst {stats['think']['worst']:.2f}, budget {stats['budget']:.1f}, {stats['over_budget']} over), "
+            f"{stats['choices_tried']:.1f} choices, poll worst {stats['poll']['worst'] * 1000:.0f} us, "
+            f"{stats['dropped_frames']} of {stats['frames']} frames dropped")
+
+
+def play_in_real_time(seconds, cpu, frame_work):
+    """Run a match like the game does: 60 frames a second, two ticks and `frame_work` ms of busy work each.
+
+    Returns the match and how many frames were dropped (see is_dropped()).
+    """
+    frame = 1 / 60
+    player_two = cpu or RandomInput(seed=2)
+    match = Match(RandomInput(seed=1), player_two)
+    if cpu:
+        cpu.start(match)
+    dropped = 0
+    ticks_per_frame = TICK_RATE // 60
+    deadline = time.perf_counter()
+    last = deadline
+    for _ in range(round(seconds * 60)):
+        deadline += frame
+        for _ in range(ticks_per_frame):
+            match.tick()
+        # Pretend drawing: pure Python, so it needs the GIL like the game's own code
+        busy_until = time.perf_counter() + frame_work / 1000
+        while time.perf_counter() < busy_until:
+            pass
+        now = time.perf_counter()
+        if now < deadline:
+            time.sleep(deadline - now)
+        now = time.perf_counter()
+        if is_dropped(now - last):
+            dropped += 1
+        if cpu:
+            cpu.record_frame(now - last)
+        last = now
+    if cpu:
+        cpu.stop()
+    return match, dropped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10, help="how long to play (default: 10)")
+    parser.add_argument("--budget", type=float, default=THINK_BUDGET * 1000,
+                        help=f"thinking time per decision in ms (default: {THINK_BUDGET * 1000:g})")
+    parser.add_argument("--frame-work", type=float, default=4,
+                        help="pretend drawing work per frame in ms (default: 4)")
+    args = parser.parse_args(argv)
+
+    # Like the game, make every hitbox mask up front instead of in the middle of a decision
+    FRAME_BOXES.load_all()
+    _, dropped = play_in_real_time(args.seconds, None, args.frame_work)
+    print(f"Without the CPU player: {dropped} of {round(args.seconds * 60)} frames dropped")
+    cpu = CpuInput(budget=args.budget / 1000)
+    match, dropped = play_in_real_time(args.seconds, cpu, args.frame_work)
+    print(f"With the CPU player:    {dropped} of {round(args.seconds * 60)} frames dropped")
+    print(stats_line(cpu.stats()))
+    print(f"Result: {match.result()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Thousands of Gojo vs Jin-Woo matches at once, with NumPy.
+
+FighterBatch keeps the fighters of many matches as a struct of arrays: one
+array per field (x, y, jump_velocity, state, state_tick, health, ...) with a
+row per match and a column per player (0 = Gojo, 1 = Jin-Woo). step() moves
+every match on by one tick with whole-array operations, following the same
+rules as Fighter.update() in fight_sim.py. Hits are found the same way as
+well: the rectangles of every attacker's hitbox and defender's hurtbox are
+compared for all matches at once, and only the few that touch go on to the
+pixel test in hitboxes.overlap(). Given the same buttons, a match in the
+batch ends up in exactly the same state as a Match, which
+
+    python jjk_game/fight_batch.py --verify 200
+
+checks against the object-oriented version tick by tick. Without --verify
+it reports how many match-ticks per second the batch runs:
+
+    python jjk_game/fight_batch.py --matches 20000 --seconds 60
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from animations import STAND, WALK, JUMP, DASH, INTRO, TICK_RATE
+from fight_sim import (INPUT_LEFT, INPUT_RIGHT, INPUT_BITS, MOVE_BUTTONS, ATTACK_DAMAGE, FRAME_BOXES,
+                       Match, ScriptedInput)
+from hitboxes import overlap
+
+# The fields that make up a fighter's state, in the order snapshot() returns them
+FIELDS = ("state", "state_tick", "x", "y", "previous_x", "previous_y", "jump_velocity", "direction", "health",
+          "attack_landed")
+
+
+class FighterBatch:
+    def __init__(self, matches):
+        self.matches = matches
+        # Fighters as a Match sets them up, so both versions start out the same
+        fighters = Match(None, None).fighters
+
+        def per_player(field):
+            return np.array([getattr(fighter, field) for fighter in fighters], dtype=np.float64)
+
+        # Rules that differ per player (one value per column)
+        self.speed = per_player("speed")
+        self.dash_speed = per_player("dash_speed")
+        self.jump_speed = per_player("jump_speed")
+        self.gravity = per_player("gravity")
+        self.ground_y = per_player("ground_y")
+        self.min_x = per_player("min_x")
+        self.max_x = per_player("max_x")
+
+        # What each character's animation table allows: duration of every state (0 = no end of its own),
+        # and which moves it has frames for. Indexed [player, state].
+        self.durations = np.array([[animation.duration or 0 if animation else 0 for animation in fighter.animations]
+                                   for fighter in fighters], dtype=np.int32)
+        self.has_move = np.array([[animation is not None for animation in fighter.animations]
+                                  for fighter in fighters])
+        self.columns = np.arange(2)
+        self.damage = np.array([[ATTACK_DAMAGE.get(state, 0) if animation else 0
+                                 for state, animation in enumerate(fighter.animations)]
+                                for fighter in fighters], dtype=np.int32)
+        self.build_frame_tables(fighters)
+
+        # The state itself, one row per match
+        shape = (matches, 2)
+        self.state = np.tile(np.array([fighter.state for fighter in fighters], dtype=np.int32), (matches, 1))
+        self.state_tick = np.zeros(shape, dtype=np.int32)
+        self.x = np.tile(per_player("x"), (matches, 1))
+        self.y = np.tile(per_player("y"), (matches, 1))
+        self.previous_x = self.x.copy()
+        self.previous_y = self.y.copy()
+        self.jump_velocity = np.zeros(shape)
+        self.direction = np.tile(np.array([fighter.direction for fighter in fighters], dtype=np.int32), (matches, 1))
+        self.health = np.tile(np.array([fighter.health for fighter in fighters], dtype=np.int32), (matches, 1))
+        self.attack_landed = np.zeros(shape, dtype=bool)
+        self.tick_count = 0
+
+    def build_frame_tables(self, fighters):
+        # Number every frame a player uses, and look them up by [player, state, tick]
+        # (like Animation.frame(), but for arrays). Then the size, hurtbox and hitbox rectangle
+        # of every frame by [player, frame number, flipped], and the masks themselves for the pixel test.
+        count = max(len(animation.by_tick) for fighter in fighters for animation in fighter.animations if animation)
+        self.frame_ids = np.zeros((2, len(fighters[0].animations), count), dtype=np.int32)
+        self.frame_counts = np.ones((2, len(fighters[0].animations)), dtype=np.int32)
+        self.loops = np.zeros((2, len(fighters[0].animations)), dtype=bool)
+        self.frame_boxes = []
+        for player, fighter in enumerate(fighters):
+            names = []
+            for state, animation in enumerate(fighter.animations):
+                if not animation:
+                    continue
+                for tick, name in enumerate(animation.by_tick):
+                    if name not in names:
+                        names.append(name)
+                    self.frame_ids[player, state, tick] = names.index(name)
+                self.frame_counts[player, state] = len(animation.by_tick)
+                self.loops[player, state] = animation.loop
+            self.frame_boxes.append([(FRAME_BOXES.get(name, False), FRAME_BOXES.get(name, True)) for name in names])
+
+        frames = max(len(boxes) for boxes in self.frame_boxes)
+        # [..., 0:2] = frame width, height; 2:6 = hurtbox left, top, width, height; 6:10 = hitbox (all 0 = none)
+        self.frame_rects = np.zeros((2, frames, 2, 10), dtype=np.int64)
+        for player, frame_boxes in enumerate(self.frame_boxes):
+            for frame, flips in enumerate(frame_boxes):
+                for flip, boxes in enumerate(flips):
+                    if boxes:
+                        self.frame_rects[player, frame, flip, 0:2] = boxes.width, boxes.height
+                        if boxes.hurt:
+                            self.frame_rects[player, frame, flip, 2:6] = boxes.hurt[:4]
+                        if boxes.hit:
+                            self.frame_rects[player, frame, flip, 6:10] = boxes.hit[:4]
+
+    def set_state(self, where, state):
+        # Switch the fighters selected by `where` to `state` (one value, or an array like self.state)
+        changed = where & (self.state != state)
+        self.state = np.where(changed, state, self.state)
+        self.state_tick[changed] = 0
+        self.attack_landed[changed] = False
+
+    def step(self, buttons):
+        """Advance every match by one tick. buttons: (matches, 2) array of INPUT_* bits."""
+        buttons = np.asarray(buttons)
+        self.previous_x[:] = self.x
+        self.previous_y[:] = self.y
+
+        # Input is ignored during the intro or a dash
+        active = (self.state != INTRO) & (self.state != DASH)
+
+        # Start a move when standing or walking; the first button held (in MOVE_BUTTONS order) wins
+        idle = active & ((self.state == STAND) | (self.state == WALK))
+        chosen = np.full(self.state.shape, -1, dtype=np.int32)
+        for state, button in MOVE_BUTTONS:
+            start = idle & (chosen < 0) & ((buttons & button) != 0) & self.has_move[:, state]
+            chosen[start] = state
+        self.set_state(chosen >= 0, chosen)
+        self.jump_velocity = np.where(chosen == JUMP, self.jump_speed, self.jump_velocity)
+
+        # Walking (also steers jumps and attacks)
+        left = active & ((buttons & INPUT_LEFT) != 0)
+        right = active & ~left & ((buttons & INPUT_RIGHT) != 0)
+        self.x = np.where(left, self.x - self.speed, self.x)
+        self.x = np.where(right, self.x + self.speed, self.x)
+        self.direction[left] = -1
+        self.direction[right] = 1
+        walking = left | right
+        can_walk = active & ((self.state == STAND) | (self.state == WALK))
+        self.set_state(can_walk, np.where(walking, WALK, STAND))
+
+        # Timed moves end by themselves
+        self.state_tick += 1
+        duration = self.durations[self.columns, self.state]
+        self.set_state((duration > 0) & (self.state_tick >= duration), STAND)
+
+        # Dashing carries the fighter forward
+        dashing = self.state == DASH
+        self.x = np.where(dashing, self.x + self.direction * self.dash_speed, self.x)
+
+        # Jumping physics
+        jumping = self.state == JUMP
+        self.y = np.where(jumping, self.y + self.jump_velocity, self.y)
+        self.jump_velocity = np.where(jumping, self.jump_velocity + self.gravity, self.jump_velocity)
+        landed = jumping & (self.y >= self.ground_y)
+        self.y = np.where(landed, self.ground_y, self.y)
+        self.jump_velocity[landed] = 0
+        self.set_state(landed, STAND)
+
+        # Keep players on their half of the arena
+        self.x = np.maximum(self.min_x, np.minimum(self.max_x, self.x))
+
+        self.attack()
+        self.tick_count += 1
+
+    def attack(self):
+        """Land every attack whose hitbox touches the opponent's hurtbox (Fighter.attack() for all matches)."""
+        damage = self.damage[self.columns, self.state]
+        attacking = (damage > 0) & ~self.attack_landed
+        # Only matches where someone is attacking and the fighters are close enough to touch
+        close = np.abs(self.x[:, 0] - self.x[:, 1]) <= FRAME_BOXES.reach
+        rows = np.flatnonzero(close & attacking.any(axis=1))
+        if not len(rows):
+            return
+        state, state_tick, direction = self.state[rows], self.state_tick[rows], self.direction[rows]
+        damage, attacking = damage[rows], attacking[rows]
+
+        # The frame each of them is showing, and where its top-left corner is
+        count = self.frame_counts[self.columns, state]
+        index = np.where(self.loops[self.columns, state], state_tick % count, np.minimum(state_tick, count - 1))
+        frame = self.frame_ids[self.columns, state, index]
+        flip = (direction < 0).astype(np.int64)
+        rects = self.frame_rects[self.columns, frame, flip]
+        left = np.floor(self.x[rows] - rects[..., 0] / 2).astype(np.int64)
+        top = np.floor(self.y[rows] - rects[..., 1] / 2).astype(np.int64)
+
+        # Broadphase: the attacker's hitbox rectangle touches the opponent's hurtbox rectangle
+        hit_left, hit_top = left + rects[..., 6], top + rects[..., 7]
+        hurt_left, hurt_top = (left + rects[..., 2])[:, ::-1], (top + rects[..., 3])[:, ::-1]
+        hurt_width, hurt_height = rects[..., 4][:, ::-1], rects[..., 5][:, ::-1]
+        touching = (attacking & (rects[..., 8] > 0) & (hurt_width > 0) &
+                    (hit_left < hurt_left + hurt_width) & (hurt_left < hit_left + rects[..., 8]) &
+                    (hit_top < hurt_top + hurt_height) & (hurt_top < hit_top + rects[..., 9]))
+
+        # The few that are left get the pixel test
+        for row, player in zip(*np.nonzero(touching)):
+            opponent = 1 - player
+            mine = self.frame_boxes[player][frame[row, player]][flip[row, player]]
+            theirs = self.frame_boxes[opponent][frame[row, opponent]][flip[row, opponent]]
+            if overlap(mine.hit, int(left[row, player]), int(top[row, player]),
+                       theirs.hurt, int(left[row, opponent]), int(top[row, opponent])):
+                match = rows[row]
+                self.health[match, opponent] = max(0, self.health[match, opponent] - damage[row, player])
+                self.attack_landed[match, player] = True
+
+    def snapshot(self, match):
+        """The state of one match as {field: (player one value, player two value)}."""
+        return {field: tuple(getattr(self, field)[match].tolist()) for field in FIELDS}
+
+
+def random_buttons(rng, matches, change_chance=1 / 30):
+    """Next tick's buttons for random players: each player sometimes switches to a new random set."""
+    buttons = np.zeros((matches, 2), dtype=np.int32)
+
+    def next_buttons(previous):
+        change = rng.random(previous.shape) < change_chance
+        return np.where(change, rng.integers(0, 1 << INPUT_BITS, previous.shape), previous)
+
+    while True:
+        buttons = next_buttons(buttons)
+        yield buttons
+
+
+def verify(matches, ticks, seed=0):
+    """Play the same random buttons through FighterBatch and through Match; return the first difference."""
+    inputs = random_buttons(np.random.default_rng(seed), matches)
+    buttons = np.stack([next(inputs) for _ in range(ticks)])
+
+    batch = FighterBatch(matches)
+    games = [Match(ScriptedInput(buttons[:, m, 0].tolist()), ScriptedInput(buttons[:, m, 1].tolist()))
+             for m in range(matches)]
+    for tick in range(ticks):
+        batch.step(buttons[tick])
+        for m, game in enumerate(games):
+            game.tick()
+            expected = {field: tuple(getattr(fighter, field) for fighter in game.fighters) for field in FIELDS}
+            if batch.snapshot(m) != expected:
+                return {"tick": tick, "match": m, "batch": batch.snapshot(m), "match_state": expected}
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--matches", "-n", type=int, default=10000, help="matches to run at once (default: 10000)")
+    parser.add_argument("--seconds", type=float, default=60, help="game time to simulate (default: 60)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random buttons (default: 0)")
+    parser.add_argument("--verify", type=int, metavar="MATCHES",
+                        help="instead, compare this many matches tick by tick with fight_sim.Match")
+    args = parser.parse_args(argv)
+    ticks = round(args.seconds * TICK_RATE)
+
+    if args.verify:
+        difference = verify(args.verify, ticks, args.seed)
+        if difference:
+            raise SystemExit(f"Batch and Match disagree: {difference}")
+        print(f"{args.verify} matches agree with fight_sim.Match on all {ticks} ticks")
+        return
+
+    rng = np.random.default_rng(args.seed)
+    batch = FighterBatch(args.matches)
+    inputs = random_buttons(rng, args.matches)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        batch.step(next(inputs))
+    elapsed = time.perf_counter() - start
+    print(f"{args.matches} matches x {ticks} ticks in {elapsed:.2f}s: "
+          f"{args.matches * ticks / elapsed:,.0f} match-ticks/s")
+
+
+if __name__ == "__main__":
+    main()
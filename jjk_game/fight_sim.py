@@ -0,0 +1,296 @@
+"""
+The fighting game's rules, without a window.
+
+Fighter and Match hold everything that happens in a fight: positions,
+jumps, moves, hits and health. They don't use pgzero or pygame, so a fight can
+run anywhere; fighting_game.py draws it and reads the keyboard, and
+headless.py runs thousands of fights with made-up inputs.
+
+Each tick a fighter is given the buttons its player is holding, as a
+bitmask of INPUT_* flags. An attack hits when the hitbox of the frame being
+shown touches the opponent's hurtbox (see hitboxes.py):
+
+    match = Match(RandomInput(seed=1), RandomInput(seed=2), round_seconds=60)
+    while not match.is_over():
+        match.tick()
+    print(match.result())
+"""
+
+import random
+from operator import attrgetter
+
+from animations import (STAND, WALK, JUMP, LIGHT_ATTACK, HEAVY_ATTACK, KICK, DASH, INTRO, TICK_RATE,
+                        JUMP_SPEED, GRAVITY, GOJO_ANIMATIONS, JINWOO_ANIMATIONS)
+from hitboxes import FrameBoxTable, overlap, place
+
+# The arena (same size as the game window)
+ARENA_WIDTH = 1200
+GROUND_Y = 450
+# How close to the centre line each player can get
+CENTER_GAP = 25
+
+# Buttons, one bit each
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+INPUT_LIGHT = 8
+INPUT_HEAVY = 16
+INPUT_KICK = 32
+INPUT_DASH = 64
+INPUT_BITS = 7
+
+# Which button starts which move. They are checked in this order, so the first one held wins.
+MOVE_BUTTONS = ((LIGHT_ATTACK, INPUT_LIGHT), (HEAVY_ATTACK, INPUT_HEAVY), (KICK, INPUT_KICK),
+                (DASH, INPUT_DASH), (JUMP, INPUT_JUMP))
+
+# Damage each attack does when it lands
+ATTACK_DAMAGE = {LIGHT_ATTACK: 5, HEAVY_ATTACK: 12, KICK: 8}
+
+# Hurtboxes and hitboxes of every frame, loaded once and shared by every Fighter
+FRAME_BOXES = FrameBoxTable()
+
+# Fighter name -> (character used for the frames, animation table)
+CHARACTERS = {
+    "Gojo": ("gojo", GOJO_ANIMATIONS),
+    "Jin-Woo": ("jinwoo", JINWOO_ANIMATIONS),
+}
+
+
+# The parts of a Fighter that change during a fight, in the order save() returns them
+SNAPSHOT_FIELDS = ("state", "state_tick", "x", "y", "previous_x", "previous_y", "jump_velocity", "direction",
+                   "health", "attack_landed")
+
+_snapshot = attrgetter(*SNAPSHOT_FIELDS)
+
+
+class Fighter:
+    # A fixed set of attributes: smaller fighters, and save()/restore() know exactly what to copy
+    __slots__ = ("name", "is_player_one", "character", "animations", "state", "state_tick", "x", "y",
+                 "previous_x", "previous_y", "speed", "dash_speed", "direction", "min_x", "max_x",
+                 "jump_velocity", "jump_speed", "gravity", "ground_y", "health", "max_health", "attack_landed")
+
+    def __init__(self, name, x, is_player_one=True):
+        self.name = name
+        self.is_player_one = is_player_one
+
+        # The character's animation table (built once in animations.py and shared)
+        self.character, self.animations = CHARACTERS[name]
+
+        # Animation state: a state ID from animations.py and how many ticks it has lasted
+        self.state = STAND
+        self.state_tick = 0
+
+        # Position, and where the fighter was one tick ago (the game draws a point in between)
+        self.x = self.previous_x = x
+        self.y = self.previous_y = GROUND_Y
+
+        # Movement (pixels per tick)
+        self.speed = 240 / TICK_RATE
+        self.dash_speed = 600 / TICK_RATE
+        self.direction = 1 if is_player_one else -1  # 1 for right, -1 for left
+
+        # Each player stays on their own half of the arena
+        if is_player_one:
+            self.min_x, self.max_x = 100, ARENA_WIDTH//2 - CENTER_GAP
+        else:
+            self.min_x, self.max_x = ARENA_WIDTH//2 + CENTER_GAP, ARENA_WIDTH - 100
+
+        # Jump state
+        self.jump_velocity = 0
+        self.jump_speed = JUMP_SPEED
+        self.gravity = GRAVITY
+        self.ground_y = GROUND_Y
+
+        # Health
+        self.health = 100
+        self.max_health = 100
+        # Whether the current attack has hit already (each one only hits once)
+        self.attack_landed = False
+
+        # Start with the intro if the character has one
+        if self.animations[INTRO]:
+            self.set_state(INTRO)
+
+    def save(self):
+        # A tuple of the SNAPSHOT_FIELDS values, to go back to later with restore()
+        return _snapshot(self)
+
+    def restore(self, snapshot):
+        # Put the fighter back the way it was when save() was called
+        for field, value in zip(SNAPSHOT_FIELDS, snapshot):
+            setattr(self, field, value)
+
+    def set_state(self, state):
+        # Switch animation state and start counting its ticks again
+        if state != self.state:
+            self.state = state
+            self.state_tick = 0
+            self.attack_landed = False
+
+    def update(self, opponent, buttons):
+        # One tick of game logic, with the buttons (INPUT_* bits) held this tick
+        self.previous_x, self.previous_y = self.x, self.y
+
+        # Handle input
+        self.handle_input(buttons)
+
+        # Timed moves (attacks, kick, dash, intro) end by themselves
+        self.state_tick += 1
+        duration = self.animations[self.state].duration
+        if duration and self.state_tick >= duration:
+            self.set_state(STAND)
+
+        # Dashing carries the fighter forward
+        if self.state == DASH:
+            self.x += self.direction * self.dash_speed
+
+        # Handle jumping physics
+        if self.state == JUMP:
+            self.y += self.jump_velocity
+            self.jump_velocity += self.gravity
+
+            # Check if landed
+            if self.y >= self.ground_y:
+                self.y = self.ground_y
+                self.jump_velocity = 0
+                self.set_state(STAND)
+
+        # Keep player on their half of the arena
+        self.x = max(self.min_x, min(self.max_x, self.x))
+
+    def handle_input(self, buttons):
+        # Nothing else can happen during the intro or a dash
+        if self.state in (INTRO, DASH):
+            return
+
+        # Start a move when standing or walking (only moves the character has frames for)
+        if self.state in (STAND, WALK):
+            for state, button in MOVE_BUTTONS:
+                if buttons & button and self.animations[state]:
+                    self.set_state(state)
+                    if state == JUMP:
+                        self.jump_velocity = self.jump_speed
+                    break
+
+        # Walking (also steers jumps and attacks)
+        walking = True
+        if buttons & INPUT_LEFT:
+            self.x -= self.speed
+            self.direction = -1
+        elif buttons & INPUT_RIGHT:
+            self.x += self.speed
+            self.direction = 1
+        else:
+            walking = False
+        if self.state in (STAND, WALK):
+            self.set_state(WALK if walking else STAND)
+
+    def boxes(self):
+        # Hurtbox and hitbox of the frame being shown right now (None if it has none)
+        frame = self.animations[self.state].frame(self.state_tick)
+        return FRAME_BOXES.get(frame, self.direction < 0)
+
+    def attack(self, opponent):
+        # Hit the opponent if this attack's hitbox touches their hurtbox. Returns True on a hit.
+        damage = ATTACK_DAMAGE.get(self.state)
+        if not damage or self.attack_landed or abs(opponent.x - self.x) > FRAME_BOXES.reach:
+            return False
+        mine, theirs = self.boxes(), opponent.boxes()
+        if not (mine and mine.hit and theirs and theirs.hurt):
+            return False
+        if not overlap(mine.hit, *place(self.x, self.y, mine), theirs.hurt, *place(opponent.x, opponent.y, theirs)):
+            return False
+        opponent.health = max(0, opponent.health - damage)
+        self.attack_landed = True
+        return True
+
+
+class Match:
+    """Gojo (player one) against Jin-Woo (player two).
+
+    Each player is an input provider: anything with a poll() method that
+    returns the INPUT_* bits held for the next tick. With round_seconds the
+    match ends when the time runs out (or someone's health does).
+    """
+
+    def __init__(self, player_one_input, player_two_input, round_seconds=None):
+        self.fighters = (Fighter("Gojo", 200, True), Fighter("Jin-Woo", ARENA_WIDTH - 200, False))
+        self.inputs = (player_one_input, player_two_input)
+        self.round_ticks = round(round_seconds * TICK_RATE) if round_seconds else None
+        self.tick_count = 0
+
+    def tick(self):
+        """Advance the fight by one tick, with the buttons the input providers give."""
+        self.step(self.inputs[0].poll(), self.inputs[1].poll())
+
+    def step(self, buttons_one, buttons_two):
+        """Advance the fight by one tick with these buttons (INPUT_* bits) for each player."""
+        player_one, player_two = self.fighters
+        player_one.update(player_two, buttons_one)
+        player_two.update(player_one, buttons_two)
+        # Attacks are checked once both have moved, so neither player gets to hit first
+        player_one.attack(player_two)
+        player_two.attack(player_one)
+        self.tick_count += 1
+
+    def save(self):
+        """Everything that changes during the fight, to go back to later with restore()."""
+        player_one, player_two = self.fighters
+        return self.tick_count, player_one.save(), player_two.save()
+
+    def restore(self, snapshot):
+        """Go back to the moment save() returned `snapshot`."""
+        self.tick_count, snapshot_one, snapshot_two = snapshot
+        self.fighters[0].restore(snapshot_one)
+        self.fighters[1].restore(snapshot_two)
+
+    def is_over(self):
+        if any(fighter.health <= 0 for fighter in self.fighters):
+            return True
+        return self.round_ticks is not None and self.tick_count >= self.round_ticks
+
+    def result(self):
+        """Winner's name (None for a draw), how many ticks it took and each fighter's health."""
+        player_one, player_two = self.fighters
+        if player_one.health > player_two.health:
+            winner = player_one.name
+        elif player_two.health > player_one.health:
+            winner = player_two.name
+        else:
+            winner = None
+        return {"winner": winner, "ticks": self.tick_count,
+                "health": {fighter.name: fighter.health for fighter in self.fighters}}
+
+
+class ScriptedInput:
+    """Plays back a list of button bitmasks, one per tick, then holds nothing."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.position = 0
+
+    def poll(self):
+        buttons = self.script[self.position] if self.position < len(self.script) else 0
+        self.position += 1
+        return buttons
+
+
+class RandomInput:
+    """Random button presses, each held for a random number of ticks.
+
+    The same seed always gives the same presses.
+    """
+
+    def __init__(self, seed=None, min_hold=6, max_hold=60):
+        self.random = random.Random(seed)
+        self.min_hold = min_hold
+        self.max_hold = max_hold
+        self.buttons = 0
+        self.hold = 0
+
+    def poll(self):
+        if self.hold <= 0:
+            self.buttons = self.random.getrandbits(INPUT_BITS)
+            self.hold = self.random.randint(self.min_hold, self.max_hold)
+        self.hold -= 1
+        return self.buttons
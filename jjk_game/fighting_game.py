@@ -1,299 +1,384 @@
+import atexit
+import sys
+import time
 import pgzrun
+import pygame
 from pgzhelper import *
+from pgzero.screen import Screen
+from animations import STAND, TICK_RATE, table_frames
+from fight_sim import (FRAME_BOXES, Match, ScriptedInput, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_LIGHT, INPUT_HEAVY,
+                       INPUT_KICK, INPUT_DASH)
+from frame_sources import REPO_ROOT, FramePreloader, bake_variants, load_character, preload_report
+from hitboxes import place
+from input_buffer import EventInput
+from input_log import KeyboardInput, RecordingInput, frame_time_summary, load_inputs, save_inputs
+from render_cache import render_cache
+
+# The text cache is shared by all the games, so it lives in the folder above this one
+sys.path.append(REPO_ROOT)
+from frame_profiler import FrameProfiler
+from text_cache import text_cache
 
 # Game setup
 WIDTH = 1200
 HEIGHT = 600
 TITLE = "JJK vs Solo Leveling: Fighting Game"
 
-# Player class for both characters
-class Fighter:
-    def __init__(self, name, x, y, is_player_one=True):
-        self.name = name
-        self.is_player_one = is_player_one
-        
-        # Load animations based on character
-        if name == "Gojo":
-            self.load_gojo_animations()
-        else:  # Jin-Woo
-            self.load_jinwoo_animations()
+# Where the animation frames come from (see frame_sources.py):
+# "png" = loose images, "atlas" = gojo_atlas.png / jinwoo_atlas.png when they exist,
+# "sheets" = cut straight out of the sprite sheets in ../gojo_frames and ../jin-woo_frames,
+# "store" = memory-mapped raw RGBA from gojo_frames.bin / jinwoo_frames.bin,
+# "indexed" = 8-bit palette frames from gojo_indexed/ and jinwoo_indexed/ (a quarter of the memory)
+FRAME_SOURCE = "atlas"
+
+# Load every frame the fighters use in the background, decoding them on a few threads while
+# the fight starts, instead of from disk the first time each one is shown (only the loose
+# PNGs need this). A frame shown before its turn comes still loads from disk, as it would without.
+PRELOAD_FRAMES = True
+# Print how long each frame took to load, once the preloader has them all
+SHOW_PRELOAD_TIMES = False
+
+# Start faster: leave the work the first frame doesn't need until it is needed. Frames are
+# loaded, scaled and flipped the first time they're shown (PRELOAD_FRAMES and PREBAKED_VARIANTS
+# are skipped) and each frame's hitbox masks are made the first time the fighters get close.
+# Time it with benchmarks/startup_bench.py.
+LAZY_STARTUP = False
+
+# Make the pre-scaled / pre-mirrored frames ("gojo-walk_3_2x_flip") up front, so the
+# render cache never has to scale or flip a frame while the game is running
+PREBAKED_VARIANTS = True
+
+# Show the render cache's hit/miss counters on screen
+SHOW_RENDER_STATS = False
+
+# Outline each fighter's hurtbox (green) and hitbox (red), see hitboxes.py
+SHOW_HITBOXES = False
+
+# Draw everything that never changes (sky, ground, centre line, names, instructions, title)
+# once into a background layer. Each frame then only puts the background back where
+# something was drawn the frame before, instead of repainting the whole window.
+STATIC_LAYER = True
+
+# Read the keyboard from key press/release events (see input_buffer.py) instead of checking
+# which keys are down once a tick: quick taps always count, an attack pressed just before
+# the last one ends still comes out, and double-tapping left or right dashes
+EVENT_INPUT = True
+# Show how long it takes from a key press to the frame that shows what it did
+SHOW_INPUT_LATENCY = False
+
+# Let the computer play Jin-Woo (see cpu_player.py). It thinks on its own thread, for at most
+# CPU_THINK_BUDGET seconds of its own work a decision, and lets the game go first every few ticks
+CPU_PLAYER_TWO = False
+CPU_THINK_BUDGET = 0.002
+# Show how long the computer thinks and how many frames were dropped while it played
+SHOW_CPU_STATS = False
+
+# Time each frame's input, physics, animation, drawing and text (F3 turns it on and off,
+# see frame_profiler.py); the timings are saved to PROFILE_CSV when the game closes
+PROFILE_FRAMES = False
+PROFILE_CSV = "frame_profile.csv"
+
+# Save every tick's buttons to this file (like "fight.inputs") when the game closes
+RECORD_INPUTS = None
+# Play a saved file back instead of reading the keyboard; the game closes at the end of it
+# and prints how long the frames took (see input_log.py)
+REPLAY_INPUTS = None
+
+# Play online (see netplay.py): set NETPLAY_PLAYER to 1 on one computer and 2 on the other,
+# and NETPLAY_HOST to the other computer's address. Each side plays with the player one keys.
+# Two windows on one computer work too (leave the host as it is).
+NETPLAY_PLAYER = None
+NETPLAY_HOST = "127.0.0.1"
+NETPLAY_PORTS = (7001, 7002)  # player one's and player two's UDP port
+
+# The game logic runs in fixed ticks (TICK_RATE a second, see animations.py),
+# however fast or slow the screen is redrawn
+TICK = 1 / TICK_RATE
+# After a long stall, catch up at most this many ticks and drop the rest
+MAX_TICKS_PER_UPDATE = TICK_RATE // 10
+
+# Keys for each player's buttons (see fight_sim.py). Jin-Woo has no kick or dash frames,
+# so player two gets no keys for them (the help text at the bottom lists the same keys)
+PLAYER_ONE_KEYS = {INPUT_LEFT: ("a",), INPUT_RIGHT: ("d",), INPUT_JUMP: ("w", "space"),
+                   INPUT_LIGHT: ("j",), INPUT_HEAVY: ("k",), INPUT_KICK: ("l",), INPUT_DASH: ("lshift",)}
+PLAYER_TWO_KEYS = {INPUT_LEFT: ("left",), INPUT_RIGHT: ("right",), INPUT_JUMP: ("up",),
+                   INPUT_LIGHT: ("n",), INPUT_HEAVY: ("m",)}
+
+# Draws one Fighter from fight_sim.py
+class FighterView:
+    def __init__(self, fighter):
+        self.fighter = fighter
+        load_character(FRAME_SOURCE, fighter.character)
+        frames = table_frames(fighter.animations)
+        # Loads the frames that aren't in memory yet in the background; update() registers
+        # them as they come in, and until then each one loads from disk when it's first shown
+        self.preloader = None
+        if PRELOAD_FRAMES and not LAZY_STARTUP:
+            self.preloader = FramePreloader(frames, bake=PREBAKED_VARIANTS)
+            # The preloader bakes the variants of the frames it brings in itself
+            frames = self.preloader.loaded
         
         # Create actor
-        self.actor = Actor(self.stand_frames[0], (x, y))
-        self.actor.scale = 2
-        
-        # Animation state
-        self.current_animation = "stand"
-        self.animation_frame = 0
-        self.animation_speed = 0.2
-        self.animation_timer = 0
-        
-        # Movement
-        self.speed = 4
-        self.direction = 1 if is_player_one else -1  # 1 for right, -1 for left
-        self.actor.flip_x = not is_player_one  # Flip Jin-Woo to face Gojo
-        
-        # Jump state
-        self.is_jumping = False
-        self.jump_velocity = 0
-        self.jump_speed = -15
-        self.gravity = 0.8
-        self.ground_y = HEIGHT - 150  # Ground level
-        
-        # Attack state
-        self.is_attacking = False
-        self.attack_timer = 0
-        self.attack_duration = 30
-        self.current_attack_type = None
-        
-        # Health
-        self.health = 100
-        self.max_health = 100
-        
-    def load_gojo_animations(self):
-        # Load Gojo animation frames
-        self.stand_frames = []
-        for i in range(1, 5):
-            self.stand_frames.append(f"gojo-stand_{i}")
-        
-        self.walk_frames = []
-        for i in range(1, 9):
-            self.walk_frames.append(f"gojo-walk_{i}")
-        
-        self.jump_frames = []
-        for i in range(1, 5):
-            self.jump_frames.append(f"jump_{i}")
-        
-        self.light_attack_frames = []
-        for i in range(1, 7):
-            self.light_attack_frames.append(f"light_attack_{i}")
-        
-        self.heavy_attack_frames = []
-        for i in range(1, 6):
-            self.heavy_attack_frames.append(f"heavy_attack_{i}")
+        if PREBAKED_VARIANTS and not LAZY_STARTUP:
+            bake_variants(frames)
+        self.actor = Actor(fighter.animations[STAND].frames[0], (fighter.x, fighter.y))
     
-    def load_jinwoo_animations(self):
-        # Load Jin-Woo animation frames
-        self.stand_frames = []
-        for i in range(1, 5):
-            self.stand_frames.append(f"jinwoo_stand_{i}")
-        
-        self.walk_frames = []
-        for i in range(1, 9):
-            self.walk_frames.append(f"run_{i}")
-        
-        self.jump_frames = []
-        for i in range(1, 5):
-            self.jump_frames.append(f"jinwoo_jump_{i}")
-        
-        self.light_attack_frames = []
-        for i in range(1, 7):
-            self.light_attack_frames.append(f"jinwoo_light_attack_{i}")
-        
-        self.heavy_attack_frames = []
-        for i in range(1, 7):
-            self.heavy_attack_frames.append(f"jinwoo-heavy-attack{i}")
+    def finish_preload(self):
+        # Register the frames the preloader has decoded since the last update
+        if self.preloader and self.preloader.poll():
+            if SHOW_PRELOAD_TIMES:
+                print("\n".join(preload_report(self.preloader.timings, self.preloader.seconds)))
+            self.preloader = None
     
-    def update(self, opponent):
-        # Handle input based on player
-        if self.is_player_one:
-            self.handle_player_one_input()
-        else:
-            self.handle_player_two_input()
-        
-        # Handle attack timer
-        if self.is_attacking:
-            self.attack_timer += 1
-            if self.attack_timer >= self.attack_duration:
-                self.is_attacking = False
-                self.attack_timer = 0
-                self.current_attack_type = None
-                self.current_animation = "stand"
-        
-        # Handle jumping physics
-        if self.is_jumping:
-            self.actor.y += self.jump_velocity
-            self.jump_velocity += self.gravity
-            
-            # Check if landed
-            if self.actor.y >= self.ground_y:
-                self.actor.y = self.ground_y
-                self.is_jumping = False
-                self.jump_velocity = 0
-                self.current_animation = "stand"
-        
-        # Set animation based on state
-        if self.is_attacking:
-            if self.current_attack_type == "heavy":
-                self.current_animation = "heavy_attack"
-            else:
-                self.current_animation = "light_attack"
-        elif self.is_jumping:
-            self.current_animation = "jump"
-        elif self.current_animation == "walk":
-            pass  # Keep walk animation
-        else:
-            self.current_animation = "stand"
-        
-        # Keep player on screen
-        if self.is_player_one:
-            self.actor.x = max(100, min(WIDTH//2 - 50, self.actor.x))
-        else:
-            self.actor.x = max(WIDTH//2 + 50, min(WIDTH - 100, self.actor.x))
-        
-        # Update animation
-        frames = self.get_current_frames()
-        
-        if self.current_animation == "jump":
-            # For jump, cycle through frames based on jump progress
-            if self.is_jumping:
-                jump_progress = (self.jump_velocity - self.jump_speed) / (0 - self.jump_speed)
-                self.animation_frame = min(3, int(jump_progress * 4))
-            else:
-                self.animation_frame = 0
-        elif self.current_animation == "light_attack":
-            # For light attack, cycle through frames based on attack timer
-            if self.is_attacking:
-                attack_progress = self.attack_timer / self.attack_duration
-                self.animation_frame = min(5, int(attack_progress * 6))
-            else:
-                self.animation_frame = 0
-        elif self.current_animation == "heavy_attack":
-            # For heavy attack, cycle through frames based on attack timer
-            if self.is_attacking:
-                attack_progress = self.attack_timer / self.attack_duration
-                self.animation_frame = min(4, int(attack_progress * 5))
-            else:
-                self.animation_frame = 0
-        else:
-            # Normal animation cycling for stand and walk
-            self.animation_timer += self.animation_speed
-            if self.animation_timer >= 1:
-                self.animation_timer = 0
-                self.animation_frame = (self.animation_frame + 1) % len(frames)
-        
-        # Set current frame with bounds checking
-        if 0 <= self.animation_frame < len(frames):
-            self.actor.image = frames[self.animation_frame]
-            self.actor.scale = 2
+    def show_frame(self, image):
+        # The render cache scales and flips each frame once; the Actor just draws the result
+        # (fighters facing left are drawn flipped)
+        render_cache.show(self.actor, image, scale=2, flip_x=self.fighter.direction < 0)
     
-    def handle_player_one_input(self):
-        # Player 1 controls (WASD + J/K)
-        if keyboard.j and not self.is_attacking and not self.is_jumping:
-            self.is_attacking = True
-            self.attack_timer = 0
-            self.current_attack_type = "light"
-        
-        if keyboard.k and not self.is_attacking and not self.is_jumping:
-            self.is_attacking = True
-            self.attack_timer = 0
-            self.current_attack_type = "heavy"
-        
-        if (keyboard.w or keyboard.space) and not self.is_jumping and not self.is_attacking:
-            self.is_jumping = True
-            self.jump_velocity = self.jump_speed
-            self.current_animation = "jump"
-        
-        if keyboard.a:
-            self.actor.x -= self.speed
-            self.direction = -1
-            self.actor.flip_x = True
-            self.current_animation = "walk"
-        elif keyboard.d:
-            self.actor.x += self.speed
-            self.direction = 1
-            self.actor.flip_x = False
-            self.current_animation = "walk"
-        else:
-            self.current_animation = "stand"
-    
-    def handle_player_two_input(self):
-        # Player 2 controls (Arrow Keys + N/M)
-        if keyboard.n and not self.is_attacking and not self.is_jumping:
-            self.is_attacking = True
-            self.attack_timer = 0
-            self.current_attack_type = "light"
-        
-        if keyboard.m and not self.is_attacking and not self.is_jumping:
-            self.is_attacking = True
-            self.attack_timer = 0
-            self.current_attack_type = "heavy"
-        
-        if keyboard.up and not self.is_jumping and not self.is_attacking:
-            self.is_jumping = True
-            self.jump_velocity = self.jump_speed
-            self.current_animation = "jump"
-        
-        if keyboard.left:
-            self.actor.x -= self.speed
-            self.direction = -1
-            self.actor.flip_x = True
-            self.current_animation = "walk"
-        elif keyboard.right:
-            self.actor.x += self.speed
-            self.direction = 1
-            self.actor.flip_x = False
-            self.current_animation = "walk"
-        else:
-            self.current_animation = "stand"
-    
-    def get_current_frames(self):
-        if self.current_animation == "walk":
-            return self.walk_frames
-        elif self.current_animation == "jump":
-            return self.jump_frames
-        elif self.current_animation == "light_attack":
-            return self.light_attack_frames
-        elif self.current_animation == "heavy_attack":
-            return self.heavy_attack_frames
-        else:
-            return self.stand_frames
-    
-    def draw(self):
+    def draw(self, alpha=1.0):
+        # Returns the rectangles it drew on
+        fighter = self.fighter
+        profiler.mark("draw")
+        # The table already knows which frame goes with this tick
+        self.show_frame(fighter.animations[fighter.state].frame(fighter.state_tick))
+        profiler.mark("animation")
+        # alpha is how far the game is from the last tick to the next one
+        self.actor.pos = (fighter.previous_x + (fighter.x - fighter.previous_x) * alpha,
+                          fighter.previous_y + (fighter.y - fighter.previous_y) * alpha)
         self.actor.draw()
+        drawn = [Rect(self.actor.topleft, (self.actor.width, self.actor.height))]
         
         # Draw health bar
-        bar_width = 200
-        bar_height = 20
-        x = 50 if self.is_player_one else WIDTH - 250
-        y = 50
+        bar = self.health_bar_rect()
         
         # Background
-        screen.draw.filled_rect(Rect(x, y, bar_width, bar_height), (100, 100, 100))
+        screen.draw.filled_rect(bar, (100, 100, 100))
         # Health
-        health_width = (self.health / self.max_health) * bar_width
-        screen.draw.filled_rect(Rect(x, y, health_width, bar_height), (255, 0, 0))
+        health_width = (fighter.health / fighter.max_health) * bar.width
+        screen.draw.filled_rect(Rect(bar.x, bar.y, health_width, bar.height), (255, 0, 0))
         # Border
-        screen.draw.rect(Rect(x, y, bar_width, bar_height), (255, 255, 255))
+        screen.draw.rect(bar, (255, 255, 255))
+        drawn.append(bar)
         
-        # Name
-        screen.draw.text(self.name, (x, y - 25), color="white", fontsize=16)
+        if SHOW_HITBOXES:
+            drawn.extend(self.draw_boxes())
+        return drawn
+    
+    def health_bar_rect(self):
+        x = 50 if self.fighter.is_player_one else WIDTH - 250
+        return Rect(x, 50, 200, 20)
+    
+    def draw_name(self, target):
+        # The name above the health bar never changes, so it goes on the background layer
+        bar = self.health_bar_rect()
+        target.draw.text(self.fighter.name, (bar.x, bar.y - 25), color="white", fontsize=16)
+    
+    def draw_boxes(self):
+        # The rectangles around the masks the game logic is using this tick
+        fighter = self.fighter
+        boxes = fighter.boxes()
+        if not boxes:
+            return []
+        left, top = place(fighter.x, fighter.y, boxes)
+        drawn = []
+        for mask, color in ((boxes.hurt, (0, 255, 0)), (boxes.hit, (255, 0, 0))):
+            if mask:
+                drawn.append(Rect(left + mask.left, top + mask.top, mask.width, mask.height))
+                screen.draw.rect(drawn[-1], color)
+        return drawn
+
+profiler = FrameProfiler(PROFILE_FRAMES, csv_path=PROFILE_CSV)
 
-# Create fighters
-gojo = Fighter("Gojo", 200, HEIGHT - 150, True)
-jinwoo = Fighter("Jin-Woo", WIDTH - 200, HEIGHT - 150, False)
+# Where the players' buttons come from: the keyboard, a recording, the computer, or (online) our
+# keyboard and the network
+keyboard_input = EventInput if EVENT_INPUT else KeyboardInput
+netplay = None
+cpu = None
+if NETPLAY_PLAYER:
+    # Imported here so playing on one computer doesn't load the networking code
+    from netplay import RollbackSession, UdpTransport
+    local = NETPLAY_PLAYER - 1
+    netplay = RollbackSession(local, UdpTransport(NETPLAY_PORTS[local], (NETPLAY_HOST, NETPLAY_PORTS[1 - local])))
+    local_input = keyboard_input(PLAYER_ONE_KEYS)
+    inputs = [None, None]
+elif REPLAY_INPUTS:
+    replay = load_inputs(REPLAY_INPUTS, TICK_RATE)
+    inputs = [ScriptedInput(buttons) for buttons in replay]
+elif CPU_PLAYER_TWO:
+    # Imported here too: the CPU player brings its own thread and command line code
+    from cpu_player import CpuInput, stats_line
+    cpu = CpuInput(player=1, budget=CPU_THINK_BUDGET)
+    inputs = [keyboard_input(PLAYER_ONE_KEYS), cpu]
+else:
+    inputs = [keyboard_input(PLAYER_ONE_KEYS), keyboard_input(PLAYER_TWO_KEYS)]
+# The inputs that need to hear about key presses
+event_inputs = [source for source in ([local_input] if netplay else inputs) if isinstance(source, EventInput)]
+if RECORD_INPUTS and not netplay:
+    inputs = [RecordingInput(source) for source in inputs]
+    
+    def save_recording():
+        save_inputs(RECORD_INPUTS, [recording.buttons for recording in inputs], TICK_RATE)
+        print(f"Saved {match.tick_count} ticks of input to {RECORD_INPUTS}")
+    atexit.register(save_recording)
 
-def update():
-    gojo.update(jinwoo)
-    jinwoo.update(gojo)
+# Create the match (no time limit) and the fighters' views
+match = netplay.match if netplay else Match(*inputs)
+gojo, jinwoo = match.fighters
+views = [FighterView(gojo), FighterView(jinwoo)]
+if not LAZY_STARTUP:
+    FRAME_BOXES.load_all()
+if cpu:
+    cpu.start(match)
 
-def draw():
-    screen.fill((50, 100, 150))  # Dark blue background
+# Time that has passed but hasn't been simulated yet (less than one tick after update())
+lag = 0.0
+
+# The background layer (made on the first draw), the window surface it was last put on,
+# and where the last frame drew over it
+background = None
+background_target = None
+dirty_rects = []
+
+# How long each frame (update + draw) took, while replaying
+frame_times = []
+frame_start = 0.0
+
+def replay_finished():
+    return REPLAY_INPUTS and match.tick_count >= len(replay[0])
+
+def fight_over():
+    # Online, a K.O. only counts once the other side's buttons confirm it (a rollback can undo a guessed one)
+    return netplay.is_over() if netplay else match.is_over()
+
+def update(dt):
+    global lag, frame_start
+    frame_start = time.perf_counter()
+    for view in views:
+        view.finish_preload()
+    profiler.start_frame()
+    if cpu:
+        cpu.record_frame(dt)
+    if REPLAY_INPUTS and (replay_finished() or match.is_over()):
+        print(f"Replayed {match.tick_count} ticks of {REPLAY_INPUTS}: {frame_time_summary(frame_times)}")
+        sys.exit()
+    # The fight is over once someone is knocked out (online, the session keeps
+    # sending our buttons and listening, so the other side can get there too)
+    if match.is_over() and not netplay:
+        return
+    # Run as many whole ticks as the time since the last update is worth
+    lag = min(lag + dt, MAX_TICKS_PER_UPDATE * TICK)
+    while lag >= TICK and not replay_finished():
+        if netplay:
+            buttons = local_input.poll()
+            profiler.mark("input")
+            # Online, a tick can't happen while we wait for the other side to catch up
+            advanced = netplay.advance(buttons)
+            profiler.mark("physics")
+            if not advanced:
+                break
+        else:
+            buttons = [source.poll() for source in inputs]
+            profiler.mark("input")
+            match.step(*buttons)
+            profiler.mark("physics")
+        lag -= TICK
+
+def draw_static(target):
+    # Everything that looks the same on every frame, drawn onto `target` (the screen or the background layer)
+    target.fill((50, 100, 150))  # Dark blue background
     
     # Draw ground
-    screen.draw.filled_rect(Rect(0, HEIGHT - 100, WIDTH, 100), (100, 150, 100))
+    target.draw.filled_rect(Rect(0, HEIGHT - 100, WIDTH, 100), (100, 150, 100))
     
     # Draw center line
-    screen.draw.line((WIDTH//2, HEIGHT - 100), (WIDTH//2, HEIGHT), (255, 255, 255))
+    target.draw.line((WIDTH//2, HEIGHT - 100), (WIDTH//2, HEIGHT), (255, 255, 255))
     
-    # Draw fighters
-    gojo.draw()
-    jinwoo.draw()
+    # Fighter names
+    for view in views:
+        view.draw_name(target)
     
     # Draw instructions
-    screen.draw.text("Player 1 (Gojo): WASD to move, W/Space to jump, J=Light, K=Heavy", (10, HEIGHT - 30), color="white", fontsize=16)
-    screen.draw.text("Player 2 (Jin-Woo): Arrow Keys to move, Up to jump, N=Light, M=Heavy", (WIDTH - 400, HEIGHT - 30), color="white", fontsize=16)
+    target.draw.text("Player 1 (Gojo): WASD to move, W/Space to jump, J=Light, K=Heavy, L=Kick, LShift=Dash", (10, HEIGHT - 30), color="white", fontsize=16)
+    target.draw.text("Player 2 (Jin-Woo): Arrow Keys to move, Up to jump, N=Light, M=Heavy", (WIDTH - 400, HEIGHT - 30), color="white", fontsize=16)
+    
+    target.draw.text("JJK vs Solo Leveling: Fighting Game", (WIDTH//2 - 150, 10), color="white", fontsize=24)
+
+def draw_text(text, *args, **kwargs):
+    # screen.draw.text, but returns the rectangle it drew on (and only renders text that has changed)
+    return text_cache.draw(screen, text, *args, **kwargs)
+
+def draw():
+    global background, background_target, dirty_rects
+    alpha = lag / TICK
+    
+    if not STATIC_LAYER:
+        draw_static(screen)
+    elif background is None or background_target is not screen.surface:
+        # First frame (or a new window): make the layer and put all of it on the screen
+        if background is None:
+            background = Screen(pygame.Surface((WIDTH, HEIGHT)).convert())
+            draw_static(background)
+        screen.blit(background.surface, (0, 0))
+        background_target = screen.surface
+    else:
+        # Put the background back only where the last frame drew something
+        for rect in dirty_rects:
+            screen.surface.blit(background.surface, rect, rect)
+    dirty_rects = []
     
-    screen.draw.text("JJK vs Solo Leveling: Fighting Game", (WIDTH//2 - 150, 10), color="white", fontsize=24)
+    # Draw fighters
+    for view in views:
+        dirty_rects.extend(view.draw(alpha))
+    profiler.mark("draw")
+    
+    if SHOW_RENDER_STATS:
+        stats = render_cache.stats()
+        dirty_rects.append(draw_text(f"Render cache: {stats['hits']} hits, {stats['misses']} misses, {stats['size']} frames",
+                                     (WIDTH//2 - 150, 40), color="white", fontsize=16))
+        stats = text_cache.stats()
+        dirty_rects.append(draw_text(f"Text cache: {stats['hits']} hits, {stats['misses']} misses, {stats['size']} texts",
+                                     (WIDTH//2 - 150, 55), color="white", fontsize=16))
+    
+    if fight_over():
+        winner = match.result()["winner"]
+        dirty_rects.append(draw_text(f"K.O.! {winner} wins!" if winner else "K.O.! Draw!",
+                                     center=(WIDTH//2, HEIGHT//2 - 150), color="yellow", fontsize=60))
+    
+    if netplay:
+        rollbacks, seconds = netplay.frame_stats()
+        stats = netplay.stats()
+        dirty_rects.append(draw_text(f"Online as player {NETPLAY_PLAYER}: {rollbacks} rollbacks ({seconds * 1000:.2f} ms) "
+                                     f"this frame, {stats['rollbacks']} in all, {stats['waiting_for']} ticks ahead",
+                                     (WIDTH//2 - 250, 70), color="white", fontsize=16))
+    
+    if SHOW_INPUT_LATENCY:
+        for i, source in enumerate(event_inputs):
+            stats = source.latency_stats()
+            dirty_rects.append(draw_text(f"Input latency (player {i + 1}): mean {stats['mean']:.1f} ms, "
+                                         f"95th percentile {stats['p95']:.1f} ms, worst {stats['worst']:.1f} ms",
+                                         (WIDTH//2 - 200, 100 + i * 18), color="white", fontsize=16))
+    
+    if SHOW_CPU_STATS and cpu:
+        dirty_rects.append(draw_text(stats_line(cpu.stats()), (WIDTH//2 - 350, 200), color="white", fontsize=16))
+    
+    profiler.mark("text")
+    profiler.end_frame()
+    dirty_rects.extend(profiler.draw(screen, (10, 90)))
+    
+    if REPLAY_INPUTS:
+        frame_times.append(time.perf_counter() - frame_start)
+    # Whatever the key presses did is on screen now
+    for source in event_inputs:
+        source.frame_drawn()
+
+def on_key_down(key):
+    if key == keys.F3:
+        profiler.toggle()
+    for source in event_inputs:
+        source.key_down(key)
+
+def on_key_up(key):
+    for source in event_inputs:
+        source.key_up(key)
 
 pgzrun.go() 
\ No newline at end of file
@@ -0,0 +1,318 @@
+"""
+Where the JJK games get their animation frames from.
+
+Every loader here puts Surfaces into Pygame Zero's image cache under the
+usual frame names ("gojo-stand_1", "jump_2", "jinwoo_stand_3", ...). So
+Actor("gojo-stand_1") and actor.image = "jump_2" keep working no matter
+where the pixels came from. Pick a source with load_character():
+
+- "png":    the loose PNGs in images/ (Pygame Zero loads each one on first use)
+- "atlas":  images/<character>_atlas.png + .json, built with
+            `python crop_spritesheet.py --atlas jjk_game/images`
+- "sheets": the original sprite sheets in ../gojo_frames and ../jin-woo_frames,
+            cut with the geometry in crop_spritesheet.py (frames that were
+            edited by hand after slicing still come from the PNGs)
+- "store":  images/<character>_frames.bin, raw RGBA written with
+            `python crop_spritesheet.py --store jjk_game/images`
+- "indexed": images/<character>_indexed/*.png, 8-bit palette frames written with
+            `python crop_spritesheet.py --indexed jjk_game/images`
+
+The atlas and sheet loaders decode one image and hand out subsurface views of
+it, so no pixels are copied per frame. The store is memory-mapped, so it
+skips PNG decoding (zlib inflate) altogether. Indexed frames stay 8-bit, so
+they take a quarter of the memory of the 32-bit frames the others make.
+
+With "png" (or an atlas that hasn't been built), Pygame Zero would load each
+frame from disk the first time an Actor shows it, in the middle of a fight.
+A FramePreloader decodes all of them on a few threads in the background
+instead, while the game starts and runs, and converts each one to the
+display's pixel format as it comes in.
+
+bake_variants() makes the pre-scaled and mirrored copies of each frame
+("gojo-walk_3_2x", "gojo-walk_3_2x_flip") available, so the games can show
+them as they are instead of scaling and flipping every frame.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+from pgzero import loaders
+
+# The repository root, where crop_spritesheet.py and the sprite sheet folders live
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Frame store layout, must match STORE_* in crop_spritesheet.py
+STORE_MAGIC = b"JJKF"
+STORE_VERSION = 1
+STORE_HEADER = struct.Struct("<4sHI")
+STORE_ENTRY = struct.Struct("<32sHHffQ")
+
+# Pre-baked variants, must match VARIANT_SCALE and variant_suffix() in crop_spritesheet.py
+VARIANT_SCALE = 2
+
+# Characters already loaded, so a second Fighter doesn't load them again
+_loaded = {}
+
+
+def register_frames(frames):
+    """Put {frame name: Surface} into Pygame Zero's image cache."""
+    for name, surface in frames.items():
+        # Same key images.load(name) looks up, so Actors find it without touching the disk
+        loaders.images.cache[loaders.images.cache_key(name, (), {})] = surface
+
+
+def is_cached(name):
+    """True if frame `name` is in Pygame Zero's image cache already."""
+    return loaders.images.cache_key(name, (), {}) in loaders.images.cache
+
+
+class FramePreloader:
+    """Loads frames on a thread pool in the background while the game runs.
+
+    Every frame in `names` that isn't in Pygame Zero's image cache yet is
+    decoded on a pool of `workers` threads (one per CPU core by default);
+    pygame lets go of the GIL while it decodes. Call poll() once per update:
+    it converts the frames decoded so far to the display's pixel format
+    (which needs the display, so it happens on the game's thread) and
+    registers them. Until a frame is in, Pygame Zero loads it from disk the
+    first time it is shown, the same as without a preloader.
+
+    With bake=True, poll() also makes each new frame's pre-scaled and
+    mirrored copies (see bake_variants()), decoding the variant PNGs written
+    by `crop_spritesheet.py --variants` on the pool too. Frames that were in
+    the cache to begin with are listed in `loaded`, for the caller to bake.
+    """
+
+    def __init__(self, names, workers=None, bake=False):
+        self.images = os.path.join(loaders.root, "images")
+        names = list(dict.fromkeys(names))
+        self.loaded = [name for name in names if is_cached(name)]
+        self.bake = bake
+        self.frames = set(names) - set(self.loaded)
+        wanted = []
+        for name in names:
+            if name in self.frames:
+                # A frame's variants go first, so they are in by the time bake_variants() asks for them
+                if bake:
+                    wanted += [variant_name(name), variant_name(name, True)]
+                wanted.append(name)
+        wanted = [name for name in wanted
+                  if not is_cached(name) and os.path.exists(os.path.join(self.images, name + ".png"))]
+
+        # {frame name: seconds it took to load}, filled in by poll()
+        self.timings = {}
+        # How long it took until every frame was in, once they are
+        self.seconds = None
+        self.start = time.perf_counter()
+        self.pool = ThreadPoolExecutor(workers or os.cpu_count()) if wanted else None
+        self.pending = deque(self.pool.submit(self._decode, name) for name in wanted)
+
+    def _decode(self, name):
+        start = time.perf_counter()
+        surface = pygame.image.load(os.path.join(self.images, name + ".png"))
+        return name, surface, time.perf_counter() - start
+
+    def poll(self):
+        """Register the frames decoded since the last poll. Returns True once every frame is in."""
+        # In the order they were asked for, so a frame never comes in before its variants
+        while self.pending and self.pending[0].done():
+            name, surface, seconds = self.pending.popleft().result()
+            start = time.perf_counter()
+            # Already shown (so loaded from disk) before the pool got to it: keep that copy
+            if not is_cached(name):
+                register_frames({name: surface.convert_alpha()})
+            if self.bake and name in self.frames:
+                bake_variants([name])
+            self.timings[name] = seconds + time.perf_counter() - start
+        if self.pending or self.seconds is not None:
+            return not self.pending
+        self.seconds = time.perf_counter() - self.start
+        if self.pool:
+            self.pool.shutdown()
+        return True
+
+
+def preload_report(timings, seconds=None):
+    """Lines describing a FramePreloader's timings (slowest first) and how long it took, for printing."""
+    if not timings:
+        return ["Preloaded no frames (they were all loaded already)"]
+    line = f"Preloaded {len(timings)} frames ({sum(timings.values()) * 1000:.1f} ms of loading"
+    # With several threads the loading overlaps, and the game runs in the meantime
+    line += f", all in {seconds * 1000:.1f} ms after the start)" if seconds is not None else ")"
+    slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)
+    return [line] + [f"  {name}: {load * 1000:.2f} ms" for name, load in slowest]
+
+
+def variant_name(name, flip=False):
+    """Image name of a frame's pre-scaled (and optionally mirrored) copy."""
+    return f"{name}_{VARIANT_SCALE}x" + ("_flip" if flip else "")
+
+
+def bake_variants(names):
+    """Make sure the pre-scaled and mirrored copy of every frame in `names` can be loaded.
+
+    Variants written by `crop_spritesheet.py --variants` (or packed into an
+    atlas or store) are used as they are. Missing ones are scaled and flipped
+    here, once, and put into the image cache.
+    """
+    for name in names:
+        for flip in (False, True):
+            variant = variant_name(name, flip)
+            try:
+                loaders.images.load(variant)
+                continue
+            except KeyError:
+                pass
+            frame = loaders.images.load(name)
+            width, height = frame.get_size()
+            # pygame.transform.scale is nearest neighbour, the same as actor.scale
+            surface = pygame.transform.scale(frame, (width * VARIANT_SCALE, height * VARIANT_SCALE))
+            if flip:
+                surface = pygame.transform.flip(surface, True, False)
+            register_frames({variant: surface})
+
+
+def load_atlas(name):
+    """Load images/<name>.png and images/<name>.json and register every frame.
+
+    Returns a dict of frame name -> Surface. If the atlas hasn't been built,
+    this returns an empty dict and the game simply loads the loose PNGs.
+    """
+    index_path = os.path.join(loaders.root, "images", name + ".json")
+    if not os.path.exists(index_path):
+        return {}
+
+    with open(index_path) as f:
+        index = json.load(f)
+    atlas = loaders.images.load(name)
+
+    frames = {}
+    for frame_name, frame in index["frames"].items():
+        frames[frame_name] = atlas.subsurface(pygame.Rect(frame["rect"]))
+    register_frames(frames)
+    return frames
+
+
+def load_sheet_frames(character):
+    """Cut a character's frames straight out of its sprite sheets and register them.
+
+    Each sheet is decoded once and keyed once (see key_sheet_in_place() in
+    crop_spritesheet.py); every frame is a subsurface view of that one
+    Surface. Frames in crop_spritesheet.hand_edited_frames are skipped, so
+    Pygame Zero loads the edited PNGs for those. Returns a dict of frame
+    name -> Surface.
+    """
+    if REPO_ROOT not in sys.path:
+        sys.path.append(REPO_ROOT)
+    # Imported here so games that don't use sheets don't pay for NumPy and Pillow
+    import numpy as np
+    from PIL import Image
+    import crop_spritesheet
+
+    frames = {}
+    for sheet_file, output_folder, config in crop_spritesheet.select_sheets():
+        if crop_spritesheet.sheet_character(sheet_file) != character:
+            continue
+        boxes = crop_spritesheet.frame_boxes(sheet_file, config)
+        if all(crop_spritesheet.hand_edited(output_folder, i) for i in range(len(boxes))):
+            continue  # Nothing to cut: don't decode the sheet
+        sheet = np.asarray(Image.open(os.path.join(REPO_ROOT, sheet_file)).convert("RGBA"))
+        keyed, boxes = crop_spritesheet.key_sheet_in_place(sheet, boxes)
+
+        height, width = keyed.shape[:2]
+        surface = pygame.image.frombuffer(np.ascontiguousarray(keyed).tobytes(), (width, height), "RGBA")
+        surface = surface.convert_alpha()
+        for i, (left, top, right, bottom) in enumerate(boxes):
+            if crop_spritesheet.hand_edited(output_folder, i):
+                continue
+            file_name = crop_spritesheet.frame_filename(sheet_file, i)
+            name = crop_spritesheet.game_frame_name(output_folder, file_name)
+            frames[name] = surface.subsurface(pygame.Rect(left, top, right - left, bottom - top))
+    register_frames(frames)
+    return frames
+
+
+def load_store(character):
+    """Memory-map images/<character>_frames.bin and register every frame.
+
+    Returns a dict of frame name -> Surface (empty if the store hasn't been
+    built, so the game falls back to the loose PNGs).
+    """
+    path = os.path.join(loaders.root, "images", f"{character}_frames.bin")
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, count = STORE_HEADER.unpack_from(data, 0)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            raise ValueError(f"{path} is not a version {STORE_VERSION} frame store")
+
+        frames = {}
+        for i in range(count):
+            raw_name, width, height, _, _, offset = STORE_ENTRY.unpack_from(
+                data, STORE_HEADER.size + i * STORE_ENTRY.size)
+            with memoryview(data)[offset:offset + width * height * 4] as pixels:
+                # frombuffer reads the mapped pages directly; convert_alpha() makes the display-format copy
+                mapped = pygame.image.frombuffer(pixels, (width, height), "RGBA")
+                frames[raw_name.rstrip(b"\0").decode("utf-8")] = mapped.convert_alpha()
+                del mapped
+    finally:
+        data.close()
+    register_frames(frames)
+    return frames
+
+
+def load_indexed(character):
+    """Load the 8-bit palette frames in images/<character>_indexed/ and register them.
+
+    Pygame Zero would convert_alpha() them to 32-bit; here they stay one byte
+    per pixel, with palette index 0 as the transparent colorkey. Returns a
+    dict of frame name -> Surface (empty if the folder hasn't been built).
+    """
+    folder = os.path.join(loaders.root, "images", f"{character}_indexed")
+    if not os.path.isdir(folder):
+        return {}
+
+    frames = {}
+    for file_name in sorted(os.listdir(folder)):
+        name, ext = os.path.splitext(file_name)
+        if ext != ".png":
+            continue
+        surface = pygame.image.load(os.path.join(folder, file_name))
+        # RLE lets blit() skip the runs of transparent pixels
+        surface.set_colorkey(0, pygame.RLEACCEL)
+        frames[name] = surface
+    register_frames(frames)
+    return frames
+
+
+def load_character(source, character):
+    """Load a character's frames ("gojo" or "jinwoo") from the given source.
+
+    Returns the frames that were registered (empty for "png", which leaves
+    loading to Pygame Zero).
+    """
+    key = (source, character)
+    if key not in _loaded:
+        if source == "atlas":
+            _loaded[key] = load_atlas(f"{character}_atlas")
+        elif source == "sheets":
+            _loaded[key] = load_sheet_frames(character)
+        elif source == "store":
+            _loaded[key] = load_store(character)
+        elif source == "indexed":
+            _loaded[key] = load_indexed(character)
+        elif source == "png":
+            _loaded[key] = {}
+        else:
+            raise ValueError(f"Unknown frame source {source!r}")
+    return _loaded[key]
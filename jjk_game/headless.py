@@ -0,0 +1,146 @@
+"""
+Run Gojo vs Jin-Woo fights with no window, as fast as the CPU allows.
+
+Every match uses the rules in fight_sim.py with made-up inputs (random
+button presses, or a script) and a renderer that draws nothing. Matches are
+spread over a pool of worker processes, and at the end you get the
+simulation speed in ticks per second and who won how often.
+
+    python jjk_game/headless.py                          # 200 one-minute matches of random inputs
+    python jjk_game/headless.py --matches 5000 --jobs 8 --seed 7
+    python jjk_game/headless.py --script fight.json      # {"player_one": [buttons, ...], "player_two": [...]}
+    python jjk_game/headless.py --replay fight.inputs    # the inputs recorded by fighting_game.py
+    python jjk_game/headless.py --json results.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from animations import TICK_RATE
+from fight_sim import Match, RandomInput, ScriptedInput
+from input_log import load_inputs
+
+
+class NullRenderer:
+    """Takes the place of the game's drawing code and draws nothing."""
+
+    def draw(self, match, alpha=1.0):
+        pass
+
+
+def make_inputs(index, seed, script=None):
+    """The two input providers for match number `index`."""
+    if script is not None:
+        return ScriptedInput(script["player_one"]), ScriptedInput(script["player_two"])
+    # Every match and player gets its own seed, so a run can be repeated exactly
+    return RandomInput(f"{seed}-{index}-1"), RandomInput(f"{seed}-{index}-2")
+
+
+def run_match(index, seed, round_seconds, script=None, renderer=None):
+    """Play one match to the end and return its result."""
+    renderer = renderer or NullRenderer()
+    match = Match(*make_inputs(index, seed, script), round_seconds=round_seconds)
+    while not match.is_over():
+        match.tick()
+        renderer.draw(match)
+    return match.result()
+
+
+def run_batch(task):
+    """Worker entry point: play a range of matches. Returns (results, seconds spent)."""
+    first, count, seed, round_seconds, script = task
+    start = time.perf_counter()
+    results = [run_match(index, seed, round_seconds, script) for index in range(first, first + count)]
+    return results, time.perf_counter() - start
+
+
+def run_matches(matches, jobs=1, seed=0, round_seconds=60, script=None):
+    """Play `matches` matches over `jobs` worker processes and summarise them."""
+    batch = max(1, -(-matches // (jobs * 4)))  # a few batches per worker, so they finish together
+    tasks = [(first, min(batch, matches - first), seed, round_seconds, script)
+             for first in range(0, matches, batch)]
+
+    start = time.perf_counter()
+    results, busy = [], 0.0
+    if jobs == 1:
+        outputs = list(map(run_batch, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            outputs = list(pool.map(run_batch, tasks))
+    for batch_results, seconds in outputs:
+        results.extend(batch_results)
+        busy += seconds
+    elapsed = time.perf_counter() - start
+    return summarise(results, elapsed, busy)
+
+
+def summarise(results, elapsed, busy):
+    """Speed and outcome statistics for a list of match results."""
+    ticks = sum(result["ticks"] for result in results)
+    names = list(results[0]["health"]) if results else []
+    wins = {name: sum(result["winner"] == name for result in results) for name in names}
+    return {
+        "matches": len(results),
+        "ticks": ticks,
+        "seconds": elapsed,
+        "ticks_per_sec": ticks / elapsed if elapsed else None,
+        # Speed of one worker on its own, without the pool's overhead
+        "ticks_per_sec_per_worker": ticks / busy if busy else None,
+        "wins": wins,
+        "draws": sum(result["winner"] is None for result in results),
+        "knockouts": sum(min(result["health"].values()) <= 0 for result in results),
+        "mean_ticks": statistics.mean(result["ticks"] for result in results) if results else 0,
+        "mean_health": {name: statistics.mean(result["health"][name] for result in results) for name in names},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--matches", "-n", type=int, default=200, help="how many matches to play (default: 200)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: one per CPU core)")
+    parser.add_argument("--round-seconds", type=float, default=60,
+                        help="game time before a match ends on time (default: 60)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random inputs (default: 0)")
+    parser.add_argument("--script", metavar="FILE",
+                        help="play these inputs instead of random ones: JSON with a list of button "
+                             "bitmasks per tick for \"player_one\" and \"player_two\"")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play the inputs recorded in FILE (see RECORD_INPUTS in fighting_game.py); "
+                             "matches last as long as the recording")
+    parser.add_argument("--json", metavar="FILE", help="also write the statistics to FILE as JSON")
+    args = parser.parse_args(argv)
+    if args.matches < 1:
+        parser.error("--matches must be at least 1")
+
+    script = None
+    round_seconds = args.round_seconds
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    elif args.replay:
+        player_one, player_two = load_inputs(args.replay, TICK_RATE)
+        if not player_one:
+            parser.error(f"{args.replay} has no ticks in it")
+        script = {"player_one": player_one, "player_two": player_two}
+        round_seconds = len(player_one) / TICK_RATE
+
+    stats = run_matches(args.matches, max(1, args.jobs), args.seed, round_seconds, script)
+    print(f"{stats['matches']} matches, {stats['ticks']} ticks in {stats['seconds']:.2f}s: "
+          f"{stats['ticks_per_sec']:,.0f} ticks/s ({stats['ticks_per_sec_per_worker']:,.0f} per worker)")
+    for name, count in stats["wins"].items():
+        print(f"  {name} won {count} ({stats['mean_health'][name]:.1f} health left on average)")
+    print(f"  {stats['draws']} draws, {stats['knockouts']} knockouts, "
+          f"{stats['mean_ticks'] / TICK_RATE:.1f}s per match on average")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(stats, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Hurtboxes and hitboxes for the fighting game, worked out from the frames.
+
+Every animation frame gets a hurtbox: the pixels of the frame that aren't
+transparent (where the fighter can be hit). Frames of the attacks also get a
+hitbox: the part of the fighter that reaches further forward than the
+character ever does while standing (the fist, foot or sword doing the
+hitting). Both are bitmasks, one int per row with a bit per pixel.
+
+They are worked out once, offline, from the PNGs in images/ and stored next
+to them in images/hitboxes.json:
+
+    python jjk_game/hitboxes.py
+
+At run time the file is loaded once (no pygame needed, so fight_sim.py can
+use it), and each frame's masks are made in the size and direction it is
+drawn in the first time the game asks for them (load_all() makes all of
+them up front instead).
+overlap() first checks whether the two masks' rectangles touch at all, which
+rules out nearly every pair for almost nothing, and only then compares the
+pixels row by row.
+"""
+
+import json
+import math
+import os
+from collections import namedtuple
+
+from animations import STAND, LIGHT_ATTACK, HEAVY_ATTACK, KICK, GOJO_ANIMATIONS, JINWOO_ANIMATIONS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HITBOX_FILE = os.path.join(HERE, "images", "hitboxes.json")
+
+# Fighters are drawn at twice the size of their frames
+SCALE = 2
+
+# Pixels at least this opaque are part of the fighter
+ALPHA_CUTOFF = 128
+
+# Moves whose frames get a hitbox
+ATTACK_STATES = (LIGHT_ATTACK, HEAVY_ATTACK, KICK)
+
+# A pixel has to stick out this many (frame) pixels past the standing pose to count as a hit
+REACH_MARGIN = 2
+
+# Animation table of each character, to find their standing pose and attack frames
+TABLES = {"gojo": GOJO_ANIMATIONS, "jinwoo": JINWOO_ANIMATIONS}
+
+
+class Mask(namedtuple("Mask", "left top width height rows")):
+    """Part of a frame: a rectangle (relative to the frame's top-left corner)
+    and one int per row of it, where bit i is the pixel in column left + i."""
+    __slots__ = ()
+
+    def scaled(self, factor):
+        """The mask of the frame drawn `factor` times bigger."""
+        rows = []
+        for row in self.rows:
+            wide = 0
+            for i in range(self.width):
+                if row >> i & 1:
+                    wide |= ((1 << factor) - 1) << (i * factor)
+            rows.extend([wide] * factor)
+        return Mask(self.left * factor, self.top * factor, self.width * factor, self.height * factor, tuple(rows))
+
+    def flipped(self, frame_width):
+        """The mask of the frame drawn mirrored (facing left)."""
+        rows = tuple(int(format(row, f"0{self.width}b")[::-1], 2) for row in self.rows)
+        return Mask(frame_width - self.left - self.width, self.top, self.width, self.height, rows)
+
+
+# Everything the game needs about one frame, as drawn: its size and its masks
+# (hurt is None for an empty frame, hit for frames that can't hit anything)
+FrameBoxes = namedtuple("FrameBoxes", "width height hurt hit")
+
+
+def place(x, y, boxes):
+    """Top-left corner of a frame drawn centred on (x, y), like an Actor."""
+    return math.floor(x - boxes.width / 2), math.floor(y - boxes.height / 2)
+
+
+def overlap(a, ax, ay, b, bx, by):
+    """Whether mask `a` with its frame's corner at (ax, ay) touches mask `b` at (bx, by)."""
+    # Broadphase: the rectangles have to overlap first
+    left = max(ax + a.left, bx + b.left)
+    right = min(ax + a.left + a.width, bx + b.left + b.width)
+    top = max(ay + a.top, by + b.top)
+    bottom = min(ay + a.top + a.height, by + b.top + b.height)
+    if left >= right or top >= bottom:
+        return False
+
+    # Then the pixels, a row at a time: line both rows up on column `left` and AND them
+    shift_a = left - (ax + a.left)
+    shift_b = left - (bx + b.left)
+    row_a = top - (ay + a.top)
+    row_b = top - (by + b.top)
+    for i in range(bottom - top):
+        if (a.rows[row_a + i] >> shift_a) & (b.rows[row_b + i] >> shift_b) & ((1 << (right - left)) - 1):
+            return True
+    return False
+
+
+class FrameBoxTable:
+    """The hurtboxes and hitboxes of every frame, as drawn: table.get(frame, flip)."""
+
+    def __init__(self, path=HITBOX_FILE):
+        self.frames = {}
+        # The masks as stored (frame size, not scaled or flipped yet), by frame name
+        self._stored = {}
+        # Furthest apart (centre to centre) two fighters can be for a hitbox to touch a hurtbox
+        self.reach = 0
+        # Without the file nobody can hit anybody (run this module to build it)
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            self._stored = json.load(f)["frames"]
+
+        def reach_of(stored, width):
+            # How far the mask goes from the frame's centre, to either side (the same when flipped)
+            if not stored:
+                return 0
+            left, _, mask_width, _ = (value * SCALE for value in stored["rect"])
+            return max(abs(left - width / 2), abs(left + mask_width - width / 2))
+
+        hit_reach = hurt_reach = 0
+        for frame in self._stored.values():
+            width = frame["size"][0] * SCALE
+            hit_reach = max(hit_reach, reach_of(frame["hit"], width))
+            hurt_reach = max(hurt_reach, reach_of(frame["hurt"], width))
+        # (plus one for rounding the positions to whole pixels)
+        self.reach = hit_reach + hurt_reach + 1
+
+    def _load(self, name):
+        # Scale (and flip) one frame's masks, both ways round
+        frame = self._stored[name]
+
+        def load_mask(stored):
+            return Mask(*stored["rect"], tuple(stored["rows"])).scaled(SCALE) if stored else None
+
+        width, height = frame["size"][0] * SCALE, frame["size"][1] * SCALE
+        hurt, hit = load_mask(frame["hurt"]), load_mask(frame["hit"])
+        self.frames[name, False] = FrameBoxes(width, height, hurt, hit)
+        self.frames[name, True] = FrameBoxes(width, height, hurt and hurt.flipped(width), hit and hit.flipped(width))
+
+    def load_all(self):
+        """Make the masks of every frame now, rather than the first time each one is needed."""
+        for name in self._stored:
+            if (name, False) not in self.frames:
+                self._load(name)
+
+    def get(self, frame, flip=False):
+        """FrameBoxes for a frame, or None if it has none."""
+        boxes = self.frames.get((frame, flip))
+        if boxes is None and frame in self._stored:
+            self._load(frame)
+            boxes = self.frames[frame, flip]
+        return boxes
+
+
+def opaque_mask(alpha, columns=None):
+    """Mask of the pixels in `alpha` (a 2D array) that are opaque, optionally only in some columns."""
+    import numpy as np
+
+    solid = alpha >= ALPHA_CUTOFF
+    if columns is not None:
+        solid = solid & columns
+    ys, xs = np.nonzero(solid)
+    if not len(xs):
+        return None
+    left, top, right, bottom = xs.min(), ys.min(), xs.max() + 1, ys.max() + 1
+    rows = [sum(1 << i for i in np.flatnonzero(row).tolist()) for row in solid[top:bottom, left:right]]
+    return Mask(int(left), int(top), int(right - left), int(bottom - top), tuple(rows))
+
+
+def build(images_dir=os.path.join(HERE, "images"), path=HITBOX_FILE):
+    """Work out the masks of every frame in the animation tables and write them to `path`.
+
+    Returns how many frames it wrote and how many of them have a hitbox.
+    """
+    # Imported here so the game doesn't need NumPy and Pillow to load the file
+    import numpy as np
+    from PIL import Image
+
+    def alpha_of(name):
+        image = Image.open(os.path.join(images_dir, name + ".png")).convert("RGBA")
+        return np.asarray(image)[..., 3]
+
+    frames = {}
+    for table in TABLES.values():
+        # How far in front of its centre the character reaches when just standing there
+        reach = 0
+        for name in table[STAND].frames:
+            alpha = alpha_of(name)
+            xs = np.flatnonzero((alpha >= ALPHA_CUTOFF).any(axis=0))
+            reach = max(reach, xs.max() + 1 - alpha.shape[1] / 2)
+
+        attack_frames = {frame for state in ATTACK_STATES if table[state] for frame in table[state].frames}
+        for animation in table:
+            for name in animation.frames if animation else ():
+                alpha = alpha_of(name)
+                height, width = alpha.shape
+                hurt = opaque_mask(alpha)
+                hit = None
+                if name in attack_frames:
+                    # Columns (by their centre) further forward than the standing reach
+                    in_front = np.arange(width) + 0.5 - width / 2 > reach + REACH_MARGIN
+                    hit = opaque_mask(alpha, in_front)
+                frames[name] = {
+                    "size": [width, height],
+                    "hurt": hurt and {"rect": list(hurt[:4]), "rows": list(hurt.rows)},
+                    "hit": hit and {"rect": list(hit[:4]), "rows": list(hit.rows)},
+                }
+
+    with open(path, "w") as f:
+        json.dump({"alpha_cutoff": ALPHA_CUTOFF, "frames": frames}, f, indent=1)
+    return len(frames), sum(frame["hit"] is not None for frame in frames.values())
+
+
+if __name__ == "__main__":
+    count, hits = build()
+    print(f"Wrote masks for {count} frames ({hits} with a hitbox) to {HITBOX_FILE}")
@@ -0,0 +1,139 @@
+"""
+Event-driven keyboard input for the fighting game.
+
+KeyboardInput (input_log.py) looks at which keys are down once a tick, so a
+key tapped and let go between two ticks is never seen. EventInput is fed by
+the game's on_key_down() / on_key_up() instead: every press and release is
+stamped with the time and queued in a ring buffer for its player, and each
+tick's poll() takes them off the queue in order. That gives:
+
+- no lost presses: a button counts for the tick its key went down, even if
+  it came back up before the tick ran (and a second press of the same button
+  waits for the next tick, so a double tap is two presses, not one)
+- input buffering: an attack, kick, jump or dash pressed up to BUFFER_SECONDS
+  before the fighter is free to do it still comes out
+- motions: buttons pressed one after another (see MOTIONS) add another
+  button, like double-tapping left or right to dash
+
+frame_drawn() (called at the end of draw()) measures the time from each key
+event to the end of the first frame that showed what it did, and
+latency_stats() sums those up in milliseconds, to see how responsive the
+game stays when frames get slow.
+"""
+
+import time
+from collections import deque
+
+from animations import TICK_RATE
+from fight_sim import INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_LIGHT, INPUT_HEAVY, INPUT_KICK, INPUT_DASH
+
+# How many key events can wait for the next tick (the oldest are dropped after that)
+EVENT_BUFFER_SIZE = 64
+
+# Pressing one of these buttons keeps it pressed for BUFFER_SECONDS, even if the key comes up sooner
+BUFFERED_BUTTONS = INPUT_JUMP | INPUT_LIGHT | INPUT_HEAVY | INPUT_KICK | INPUT_DASH
+BUFFER_SECONDS = 0.1
+BUFFER_TICKS = round(BUFFER_SECONDS * TICK_RATE)
+
+# (button, presses): pressing the buttons in `presses` one after another, each within
+# MOTION_SECONDS of the one before, also presses `button`
+MOTIONS = (
+    (INPUT_DASH, (INPUT_LEFT, INPUT_LEFT)),
+    (INPUT_DASH, (INPUT_RIGHT, INPUT_RIGHT)),
+)
+MOTION_SECONDS = 0.25
+MOTION_TICKS = round(MOTION_SECONDS * TICK_RATE)
+
+# How many input-to-frame latencies latency_stats() looks at
+LATENCY_SAMPLES = 240
+
+
+class EventInput:
+    """A player's buttons from key events. keys is {button bit: (key name, ...)}, like KeyboardInput."""
+
+    def __init__(self, keys):
+        self.buttons = {name.upper(): button for button, names in keys.items() for name in names}
+        self.events = deque(maxlen=EVENT_BUFFER_SIZE)
+        self.dropped = 0
+        self.held_keys = set()
+        self.tick = 0
+        # The tick each button was last pressed on, and the last few presses (tick, button) for motions
+        self.pressed_at = {}
+        self.presses = deque(maxlen=max(len(presses) for _, presses in MOTIONS))
+        # Times of the events the ticks since the last frame_drawn() used
+        self.consumed = []
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def key_down(self, key):
+        """Call from on_key_down(key). Returns whether the key is one of this player's."""
+        return self._queue(key, True)
+
+    def key_up(self, key):
+        """Call from on_key_up(key)."""
+        return self._queue(key, False)
+
+    def _queue(self, key, down):
+        if key.name not in self.buttons:
+            return False
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append((time.perf_counter(), key.name, down))
+        return True
+
+    def poll(self):
+        """The buttons for the next tick, from the events queued since the last one."""
+        pressed = 0
+        while self.events:
+            stamp, name, down = self.events[0]
+            button = self.buttons[name]
+            if down and name not in self.held_keys:
+                # A button is pressed at most once a tick; a second press waits for the next one
+                if pressed & button:
+                    break
+                pressed |= button
+                self.pressed_at[button] = self.tick
+                self.presses.append((self.tick, button))
+            if down:
+                self.held_keys.add(name)
+            else:
+                self.held_keys.discard(name)
+            self.events.popleft()
+            self.consumed.append(stamp)
+
+        buttons = pressed
+        for name in self.held_keys:
+            buttons |= self.buttons[name]
+        if pressed:
+            for button, presses in MOTIONS:
+                if self.finished_motion(presses):
+                    buttons |= button
+                    self.pressed_at[button] = self.tick
+        # Presses that are still in the buffer
+        for button, tick in self.pressed_at.items():
+            if button & BUFFERED_BUTTONS and self.tick - tick < BUFFER_TICKS:
+                buttons |= button
+        self.tick += 1
+        return buttons
+
+    def finished_motion(self, presses):
+        # Whether the last presses, the last one this tick, are `presses`, each soon enough after the one before
+        recent = list(self.presses)[-len(presses):]
+        if len(recent) < len(presses) or recent[-1][0] != self.tick:
+            return False
+        if any(button != wanted for (_, button), wanted in zip(recent, presses)):
+            return False
+        return all(later - earlier <= MOTION_TICKS for (earlier, _), (later, _) in zip(recent, recent[1:]))
+
+    def frame_drawn(self):
+        """Call at the end of draw(): the events used since the last frame are now on screen."""
+        now = time.perf_counter()
+        self.latencies.extend(now - stamp for stamp in self.consumed)
+        self.consumed.clear()
+
+    def latency_stats(self):
+        """Input-to-frame latency of the last LATENCY_SAMPLES key events, in milliseconds."""
+        if not self.latencies:
+            return {"events": 0, "mean": 0.0, "p95": 0.0, "worst": 0.0, "dropped": self.dropped}
+        ms = sorted(seconds * 1000 for seconds in self.latencies)
+        return {"events": len(ms), "mean": sum(ms) / len(ms), "p95": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+                "worst": ms[-1], "dropped": self.dropped}
@@ -0,0 +1,123 @@
+"""
+Record the buttons the players hold, tick by tick, and play them back.
+
+A game's inputs are input providers: anything with a poll() method that
+returns a bitmask of the buttons held for the next tick (see fight_sim.py).
+Wrapping them in RecordingInput keeps a copy of every tick, and
+save_inputs() writes those to a small binary file:
+
+    header:  b"JJKI", version, tick rate, number of players, number of ticks
+    runs:    one button byte per player, then how many ticks (uint16) they were held
+
+Buttons are usually held for many ticks in a row, so a minute of two-player
+fighting takes a few hundred bytes. load_inputs() reads a file back into one
+list of buttons per player, ready for fight_sim.ScriptedInput. The same
+fight then happens again exactly, tick for tick, so heavy scenes can be
+replayed after a change and their frame times compared (see the REPLAY_INPUTS
+setting in the games and `headless.py --replay`).
+"""
+
+import struct
+
+LOG_MAGIC = b"JJKI"
+LOG_VERSION = 1
+LOG_HEADER = struct.Struct("<4sHHBI")
+RUN_LENGTH = struct.Struct("<H")
+MAX_RUN = 0xFFFF
+
+
+class KeyboardInput:
+    """Reads a player's buttons from the keyboard.
+
+    keys is {button bit: (key name, ...)}; a button is held while any of its keys is.
+    """
+
+    def __init__(self, keys):
+        # Imported here so the rest of this module works without a window
+        from pgzero.constants import keys as key_codes
+        from pgzero.keyboard import keyboard
+        self.keyboard = keyboard
+        # Looked up once: keyboard["a"] works too, but warns that it's deprecated on every call
+        self.keys = {button: tuple(key_codes[name.upper()] for name in names) for button, names in keys.items()}
+
+    def poll(self):
+        buttons = 0
+        for button, key_codes in self.keys.items():
+            if any(self.keyboard[key] for key in key_codes):
+                buttons |= button
+        return buttons
+
+
+class RecordingInput:
+    """Passes another input provider's buttons on and remembers them."""
+
+    def __init__(self, source):
+        self.source = source
+        self.buttons = []
+
+    def poll(self):
+        buttons = self.source.poll()
+        self.buttons.append(buttons)
+        return buttons
+
+
+def save_inputs(path, players, tick_rate):
+    """Write one list of buttons per player (all the same length) to `path`."""
+    ticks = len(players[0]) if players else 0
+    if any(len(buttons) != ticks for buttons in players):
+        raise ValueError("Every player needs the same number of ticks")
+
+    runs = []
+    held, count = None, 0
+    for tick in zip(*players):
+        if tick == held and count < MAX_RUN:
+            count += 1
+            continue
+        if held is not None:
+            runs.append(bytes(held) + RUN_LENGTH.pack(count))
+        held, count = tick, 1
+    if held is not None:
+        runs.append(bytes(held) + RUN_LENGTH.pack(count))
+
+    with open(path, "wb") as f:
+        f.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, tick_rate, len(players), ticks))
+        f.write(b"".join(runs))
+
+
+def load_inputs(path, tick_rate=None):
+    """Read a file written by save_inputs(). Returns one list of buttons per player.
+
+    With tick_rate, the file has to have been recorded at that rate.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, recorded_rate, player_count, ticks = LOG_HEADER.unpack_from(data, 0)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError(f"{path} is not a version {LOG_VERSION} input log")
+    if tick_rate is not None and recorded_rate != tick_rate:
+        raise ValueError(f"{path} was recorded at {recorded_rate} ticks a second, not {tick_rate}")
+
+    players = [[] for _ in range(player_count)]
+    offset = LOG_HEADER.size
+    while offset < len(data):
+        held = data[offset:offset + player_count]
+        (count,) = RUN_LENGTH.unpack_from(data, offset + player_count)
+        for buttons, player in zip(held, players):
+            player.extend([buttons] * count)
+        offset += player_count + RUN_LENGTH.size
+    if any(len(player) != ticks for player in players):
+        raise ValueError(f"{path} is cut short: expected {ticks} ticks")
+    return players
+
+
+def frame_time_summary(frame_times):
+    """One line about a list of frame times (seconds), to compare replays with."""
+    # Imported here, since only replays need it
+    import statistics
+
+    if not frame_times:
+        return "no frames"
+    ms = sorted(seconds * 1000 for seconds in frame_times)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return (f"{len(ms)} frames: mean {statistics.mean(ms):.3f} ms, median {statistics.median(ms):.3f} ms, "
+            f"95th percentile {p95:.3f} ms, worst {ms[-1]:.3f} ms")
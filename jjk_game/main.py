@@ -1,14 +1,79 @@
+import atexit
+import sys
+import time
 import pgzrun
 from pgzhelper import *
+from frame_sources import REPO_ROOT, FramePreloader, bake_variants, load_character, preload_report
+from input_log import KeyboardInput, RecordingInput, frame_time_summary, load_inputs, save_inputs
+from render_cache import render_cache
+
+# The text cache is shared by all the games, so it lives in the folder above this one
+sys.path.append(REPO_ROOT)
+from frame_profiler import FrameProfiler
+from text_cache import text_cache
 
 # Game setup
 WIDTH = 800
 HEIGHT = 600
 TITLE = "JJK: Gojo's Adventure"
 
+# Where Gojo's frames come from (see frame_sources.py):
+# "png" = loose images, "atlas" = gojo_atlas.png when it exists,
+# "sheets" = cut straight out of the sprite sheets in ../gojo_frames,
+# "store" = memory-mapped raw RGBA from gojo_frames.bin,
+# "indexed" = 8-bit palette frames from gojo_indexed/ (a quarter of the memory)
+FRAME_SOURCE = "atlas"
+
+# Load all of Gojo's frames in the background, decoding them on a few threads while the game
+# starts, instead of from disk the first time each one is shown (only the loose PNGs need this).
+# A frame shown before its turn comes still loads from disk, as it would without.
+PRELOAD_FRAMES = True
+# Print how long each frame took to load, once the preloader has them all
+SHOW_PRELOAD_TIMES = False
+
+# Start faster: leave the work the first frame doesn't need until it is needed. Frames are
+# loaded, scaled and flipped the first time they're shown (PRELOAD_FRAMES and PREBAKED_VARIANTS
+# are skipped). Time it with benchmarks/startup_bench.py.
+LAZY_STARTUP = False
+
+# Make the pre-scaled / pre-mirrored frames ("gojo-walk_3_2x_flip") up front, so the
+# render cache never has to scale or flip a frame while the game is running
+PREBAKED_VARIANTS = True
+
+# Show the render cache's hit/miss counters on screen
+SHOW_RENDER_STATS = False
+
+# Time each frame's input, physics, animation, drawing and text (F3 turns it on and off,
+# see frame_profiler.py); the timings are saved to PROFILE_CSV when the game closes
+PROFILE_FRAMES = False
+PROFILE_CSV = "frame_profile.csv"
+
+# Save every update's buttons to this file (like "gojo.inputs") when the game closes
+RECORD_INPUTS = None
+# Play a saved file back instead of reading the keyboard; the game closes at the end of it
+# and prints how long the frames took (see input_log.py)
+REPLAY_INPUTS = None
+
+# Pygame Zero calls update() 60 times a second, and the game moves on one step each time
+UPDATE_RATE = 60
+
+# Buttons, one bit each (the same bits as in fight_sim.py, plus crouch)
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+INPUT_LIGHT = 8
+INPUT_HEAVY = 16
+INPUT_CROUCH = 128
+
+# Keys for each button
+KEYS = {INPUT_LEFT: ("left", "a"), INPUT_RIGHT: ("right", "d"), INPUT_JUMP: ("up", "w", "space"),
+        INPUT_CROUCH: ("down", "s"), INPUT_LIGHT: ("j",), INPUT_HEAVY: ("k",)}
+
 # Player class
 class Player:
     def __init__(self):
+        load_character(FRAME_SOURCE, "gojo")
+        
         # Load stand animation frames
         self.stand_frames = []
         for i in range(1, 5):  # 4 stand frames
@@ -41,9 +106,25 @@ class Player:
         
 
         
+        # Which way the sprite faces
+        self.flip_x = False
+        
+        # Every frame the player can show
+        frames = (self.stand_frames + self.walk_frames + self.crouch_frames + self.jump_frames +
+                  self.light_attack_frames + self.heavy_attack_frames)
+        # Loads the frames that aren't in memory yet in the background; update() registers
+        # them as they come in, and until then each one loads from disk when it's first shown
+        self.preloader = None
+        if PRELOAD_FRAMES and not LAZY_STARTUP:
+            self.preloader = FramePreloader(frames, bake=PREBAKED_VARIANTS)
+            # The preloader bakes the variants of the frames it brings in itself
+            frames = self.preloader.loaded
+        
         # Create player actor
+        if PREBAKED_VARIANTS and not LAZY_STARTUP:
+            bake_variants(frames)
         self.actor = Actor(self.stand_frames[0], (WIDTH//2, HEIGHT//2))  # Use first stand frame
-        self.actor.scale = 2  # Make sprite bigger
+        self.show_frame(self.stand_frames[0])  # Shown 2x bigger
         
         # Animation state
         self.current_animation = "stance-2_1"
@@ -73,33 +154,33 @@ class Player:
         
 
         
-    def update(self):
-        # Handle input using pygame-zero keyboard
+    def update(self, buttons):
+        # Handle input: buttons are the INPUT_* bits held this update
         # Movement
         previous_animation = self.current_animation
         
         # Check for light attack input
-        if keyboard.j and not self.is_attacking and not self.is_jumping and not self.is_crouching:
+        if buttons & INPUT_LIGHT and not self.is_attacking and not self.is_jumping and not self.is_crouching:
             self.is_attacking = True
             self.attack_timer = 0
             self.current_attack_type = "light"
             self.current_animation = "light_attack"
         
         # Check for heavy attack input
-        if keyboard.k and not self.is_attacking and not self.is_jumping and not self.is_crouching:
+        if buttons & INPUT_HEAVY and not self.is_attacking and not self.is_jumping and not self.is_crouching:
             self.is_attacking = True
             self.attack_timer = 0
             self.current_attack_type = "heavy"
             self.current_animation = "heavy_attack"
         
         # Check for jump input
-        if (keyboard.up or keyboard.w or keyboard.space) and not self.is_jumping and not self.is_crouching and not self.is_attacking:
+        if buttons & INPUT_JUMP and not self.is_jumping and not self.is_crouching and not self.is_attacking:
             self.is_jumping = True
             self.jump_velocity = self.jump_speed
             self.current_animation = "jump"
         
         # Check for crouch input
-        if keyboard.down or keyboard.s:
+        if buttons & INPUT_CROUCH:
             self.is_crouching = True
         else:
             self.is_crouching = False
@@ -135,15 +216,15 @@ class Player:
             self.current_animation = "jump"
         elif self.is_crouching:
             self.current_animation = "crouch"
-        elif keyboard.left or keyboard.a:
+        elif buttons & INPUT_LEFT:
             self.actor.x -= self.speed
             self.direction = -1
-            self.actor.flip_x = True
+            self.flip_x = True
             self.current_animation = "walk"
-        elif keyboard.right or keyboard.d:
+        elif buttons & INPUT_RIGHT:
             self.actor.x += self.speed
             self.direction = 1
-            self.actor.flip_x = False
+            self.flip_x = False
             self.current_animation = "walk"
         else:
             self.current_animation = "stand"
@@ -154,6 +235,7 @@ class Player:
         
         # Keep player on screen
         self.actor.x = max(50, min(WIDTH - 50, self.actor.x))
+        profiler.mark("physics")
         
         # Update animation
         frames = self.get_current_frames()
@@ -197,9 +279,20 @@ class Player:
         
         # Set current frame with bounds checking
         if 0 <= self.animation_frame < len(frames):
-            self.actor.image = frames[self.animation_frame]
-            # Ensure consistent scale
-            self.actor.scale = 2
+            self.show_frame(frames[self.animation_frame])
+        profiler.mark("animation")
+    
+    def finish_preload(self):
+        """Register the frames the preloader has decoded since the last update."""
+        if self.preloader and self.preloader.poll():
+            if SHOW_PRELOAD_TIMES:
+                print("\n".join(preload_report(self.preloader.timings, self.preloader.seconds)))
+            self.preloader = None
+    
+    def show_frame(self, image):
+        """Show a frame 2x bigger, facing the way the player is facing"""
+        # The render cache scales and flips each frame once; the Actor just draws the result
+        render_cache.show(self.actor, image, scale=2, flip_x=self.flip_x)
     
     def get_current_frames(self):
         if self.current_animation == "walk":
@@ -225,9 +318,41 @@ class Player:
 
 # Create player
 player = Player()
+profiler = FrameProfiler(PROFILE_FRAMES, csv_path=PROFILE_CSV)
+
+# Where the buttons come from: the keyboard, or a recording
+if REPLAY_INPUTS:
+    # Imported here so the game doesn't load the fighting game's rules unless it's replaying
+    from fight_sim import ScriptedInput
+    replay = load_inputs(REPLAY_INPUTS, UPDATE_RATE)[0]
+    player_input = ScriptedInput(replay)
+else:
+    player_input = KeyboardInput(KEYS)
+if RECORD_INPUTS:
+    player_input = RecordingInput(player_input)
+    
+    def save_recording():
+        save_inputs(RECORD_INPUTS, [player_input.buttons], UPDATE_RATE)
+        print(f"Saved {len(player_input.buttons)} updates of input to {RECORD_INPUTS}")
+    atexit.register(save_recording)
+
+# How long each frame (update + draw) took, while replaying
+frame_times = []
+frame_start = 0.0
+updates = 0
 
 def update():
-    player.update()
+    global frame_start, updates
+    frame_start = time.perf_counter()
+    if REPLAY_INPUTS and updates >= len(replay):
+        print(f"Replayed {updates} updates of {REPLAY_INPUTS}: {frame_time_summary(frame_times)}")
+        sys.exit()
+    player.finish_preload()
+    profiler.start_frame()
+    buttons = player_input.poll()
+    profiler.mark("input")
+    player.update(buttons)
+    updates += 1
 
 def draw():
     screen.fill((100, 150, 255))  # Sky blue background
@@ -237,13 +362,31 @@ def draw():
     
     # Draw player
     player.draw()
+    profiler.mark("draw")
     
     # Draw instructions
-    screen.draw.text("A/D or Arrow Keys: Move", (10, 10), color="white", fontsize=20)
-    screen.draw.text("S or Down Arrow: Crouch", (10, 35), color="white", fontsize=20)
-    screen.draw.text("W/Up Arrow/Space: Jump", (10, 60), color="white", fontsize=20)
-    screen.draw.text("J: Light Attack", (10, 85), color="white", fontsize=20)
-    screen.draw.text("K: Heavy Attack", (10, 110), color="white", fontsize=20)
-    screen.draw.text("JJK: Gojo's Adventure", (WIDTH//2 - 100, HEIGHT - 30), color="white", fontsize=20)
+    text_cache.draw(screen, "A/D or Arrow Keys: Move", (10, 10), color="white", fontsize=20)
+    text_cache.draw(screen, "S or Down Arrow: Crouch", (10, 35), color="white", fontsize=20)
+    text_cache.draw(screen, "W/Up Arrow/Space: Jump", (10, 60), color="white", fontsize=20)
+    text_cache.draw(screen, "J: Light Attack", (10, 85), color="white", fontsize=20)
+    text_cache.draw(screen, "K: Heavy Attack", (10, 110), color="white", fontsize=20)
+    text_cache.draw(screen, "JJK: Gojo's Adventure", (WIDTH//2 - 100, HEIGHT - 30), color="white", fontsize=20)
+    
+    if SHOW_RENDER_STATS:
+        stats = render_cache.stats()
+        text_cache.draw(screen, f"Render cache: {stats['hits']} hits, {stats['misses']} misses", (10, 135), color="white", fontsize=20)
+        stats = text_cache.stats()
+        text_cache.draw(screen, f"Text cache: {stats['hits']} hits, {stats['misses']} misses", (10, 160), color="white", fontsize=20)
+    
+    profiler.mark("text")
+    profiler.end_frame()
+    profiler.draw(screen, (10, 190))
+    
+    if REPLAY_INPUTS:
+        frame_times.append(time.perf_counter() - frame_start)
+
+def on_key_down(key):
+    if key == keys.F3:
+        profiler.toggle()
 
 pgzrun.go() 
\ No newline at end of file
@@ -0,0 +1,347 @@
+"""
+Online versus for the fighting game, with rollback.
+
+Each side runs the whole Match and only sends its own buttons over UDP.
+The other player's buttons for a tick usually arrive a little late, so
+instead of waiting, RollbackSession guesses them (the other player keeps
+holding whatever they held last) and carries on. When the real buttons turn
+up and the guess was wrong, it goes back to the snapshot of that tick
+(Match.save() / restore()) and plays the ticks since then again with the
+right buttons. Nobody waits for the network unless the other side falls
+more than max_rollback ticks behind.
+
+A K.O. is only final once the other player's buttons up to it are confirmed
+(is_over()): one that came from a wrong guess is undone by the rollback. Both
+sides keep playing ticks (and sending their buttons) after a K.O., but the
+match itself stops at it, so they end on the same tick.
+
+Every packet repeats all the buttons the other side hasn't confirmed yet,
+so a lost packet is made up for by the next one.
+
+Try it over loopback, with made-up players and a bad connection:
+
+    python jjk_game/netplay.py --seconds 30 --latency 80 --jitter 20 --loss 0.1
+
+That plays both sides in one process through real UDP sockets, then checks
+that both ended up in the same state as an offline Match with the same
+buttons, and prints how often they rolled back and how long resimulating
+took. fighting_game.py uses it when NETPLAY_PLAYER is set.
+"""
+
+import argparse
+import random
+import socket
+import statistics
+import struct
+import time
+from collections import deque
+
+from animations import TICK_RATE
+from fight_sim import Match, RandomInput
+
+# Packet: magic, sender's next unconfirmed tick of ours (ack), first tick of the buttons, how many
+PACKET_MAGIC = b"JJKN"
+PACKET_HEADER = struct.Struct("<4sIIB")
+# Most buttons one packet carries
+MAX_PACKET_TICKS = 255
+
+# How far ahead of the other player's confirmed buttons a session may run (100 ms at 120 ticks)
+MAX_ROLLBACK = 12
+
+
+class UdpTransport:
+    """Sends and receives packets on a UDP socket, optionally over a simulated bad connection.
+
+    latency and jitter (seconds) delay every packet sent, and loss is the
+    chance that one is dropped. clock tells the time (time.monotonic unless
+    a test wants its own).
+    """
+
+    def __init__(self, port, peer, latency=0.0, jitter=0.0, loss=0.0, seed=None, clock=time.monotonic):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("", port))
+        self.socket.setblocking(False)
+        self.peer = peer
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.clock = clock
+        # (time to send it, packet), for the simulated latency
+        self.outgoing = deque()
+        self.sent = self.dropped = 0
+
+    def send(self, packet):
+        if self.random.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter) if self.latency or self.jitter else 0
+        self.outgoing.append((self.clock() + max(0.0, delay), packet))
+        self.flush()
+
+    def flush(self):
+        # Send whatever has waited long enough (out of order, if jitter says so)
+        now = self.clock()
+        waiting = deque()
+        while self.outgoing:
+            due, packet = self.outgoing.popleft()
+            if due <= now:
+                self.socket.sendto(packet, self.peer)
+                self.sent += 1
+            else:
+                waiting.append((due, packet))
+        self.outgoing = waiting
+
+    def receive(self):
+        """Every packet that has arrived since the last call."""
+        self.flush()
+        packets = []
+        while True:
+            try:
+                packets.append(self.socket.recv(2048))
+            except BlockingIOError:
+                return packets
+            except ConnectionResetError:
+                # Windows says this when a packet we sent reached a port nobody listens on
+                # (the other game hasn't started yet). There may still be packets to read.
+                continue
+
+    def close(self):
+        self.socket.close()
+
+
+class RollbackSession:
+    """One side of an online match: local_player (0 or 1) plays against whoever is on `transport`.
+
+    Call advance() with the local buttons once per tick, also after a K.O.;
+    session.match is the fight to draw, and is_over() says when it's over
+    for good. stats() has the rollback counters, and frame_stats() what
+    happened since it was last called (call it once per frame).
+    """
+
+    def __init__(self, local_player, transport, max_rollback=MAX_ROLLBACK):
+        self.match = Match(None, None)
+        self.local = local_player
+        self.transport = transport
+        self.max_rollback = max_rollback
+
+        # Ticks played so far (the match stops counting at a K.O., this doesn't)
+        self.ticks_played = 0
+        # Buttons by tick: ours, the other player's confirmed ones, and what we guessed for them
+        self.local_inputs = {}
+        self.remote_inputs = {}
+        self.predicted = {}
+        # Match.save() at the start of every tick we may still have to go back to
+        self.snapshots = {}
+        # Next tick whose remote buttons we don't have yet (all before it are confirmed),
+        # and the buttons of the tick before it, which is what we guess they keep holding
+        self.remote_confirmed = 0
+        self.last_remote = 0
+        # Next tick of ours the other side doesn't have yet
+        self.peer_ack = 0
+
+        self.rollbacks = self.resimulated = self.mispredictions = self.stalls = 0
+        self.resimulate_seconds = 0.0
+        self.frame_rollbacks = 0
+        self.frame_resimulate_seconds = 0.0
+
+    def advance(self, buttons):
+        """Play one tick with our `buttons`. Returns False (and plays nothing) while waiting for the other side."""
+        self.receive()
+        tick = self.ticks_played
+        if tick - self.remote_confirmed >= self.max_rollback:
+            # Too far ahead: going back any further would cost too much, so wait
+            self.stalls += 1
+            self.send()
+            return False
+
+        self.local_inputs[tick] = buttons
+        self.send()
+        self.snapshots[tick] = self.match.save()
+        self.step(tick)
+        self.ticks_played += 1
+        self.forget_before(min(self.remote_confirmed, self.peer_ack))
+        return True
+
+    def is_over(self):
+        """Whether someone is knocked out, with the other side's buttons up to the K.O. confirmed.
+
+        Until then a K.O. may come from a wrong guess, and a rollback can undo it.
+        """
+        return self.match.is_over() and self.remote_confirmed >= self.match.tick_count
+
+    def step(self, tick):
+        # Play `tick` with our buttons and the other player's (real ones if we have them)
+        remote = self.remote_inputs.get(tick)
+        if remote is None:
+            remote = self.last_remote
+            self.predicted[tick] = remote
+        # Nothing happens after a K.O. (but the tick still counts, so a rollback can replay it)
+        if self.match.is_over():
+            return
+        buttons = (self.local_inputs[tick], remote) if self.local == 0 else (remote, self.local_inputs[tick])
+        self.match.step(*buttons)
+
+    def send(self):
+        # Everything the other side hasn't confirmed yet, starting from their ack
+        first = self.peer_ack
+        last = min(max(self.local_inputs, default=-1) + 1, first + MAX_PACKET_TICKS)
+        buttons = bytes(self.local_inputs[tick] for tick in range(first, last))
+        self.transport.send(PACKET_HEADER.pack(PACKET_MAGIC, self.remote_confirmed, first, len(buttons)) + buttons)
+
+    def receive(self):
+        """Take in the other side's buttons, and roll back if we guessed any of them wrong."""
+        wrong_from = None
+        for packet in self.transport.receive():
+            if len(packet) < PACKET_HEADER.size:
+                continue
+            magic, ack, first, count = PACKET_HEADER.unpack_from(packet)
+            if magic != PACKET_MAGIC:
+                continue
+            self.peer_ack = max(self.peer_ack, ack)
+            for i, buttons in enumerate(packet[PACKET_HEADER.size:PACKET_HEADER.size + count]):
+                tick = first + i
+                if tick in self.remote_inputs or tick < self.remote_confirmed:
+                    continue
+                self.remote_inputs[tick] = buttons
+                guess = self.predicted.pop(tick, None)
+                if guess is not None and guess != buttons:
+                    self.mispredictions += 1
+                    wrong_from = tick if wrong_from is None else min(wrong_from, tick)
+            while self.remote_confirmed in self.remote_inputs:
+                self.last_remote = self.remote_inputs[self.remote_confirmed]
+                self.remote_confirmed += 1
+        if wrong_from is not None:
+            self.rollback(wrong_from)
+
+    def rollback(self, tick):
+        # Go back to the start of `tick` and play up to where we were with what we know now
+        start = time.perf_counter()
+        now = self.ticks_played
+        self.match.restore(self.snapshots[tick])
+        for replayed in range(tick, now):
+            self.snapshots[replayed] = self.match.save()
+            self.step(replayed)
+        seconds = time.perf_counter() - start
+
+        self.rollbacks += 1
+        self.resimulated += now - tick
+        self.resimulate_seconds += seconds
+        self.frame_rollbacks += 1
+        self.frame_resimulate_seconds += seconds
+
+    def forget_before(self, tick):
+        # Ticks before this are confirmed on both sides, so they can't be rolled back or resent
+        for table in (self.snapshots, self.local_inputs, self.remote_inputs):
+            for old in [old for old in table if old < tick]:
+                del table[old]
+
+    def frame_stats(self):
+        """(rollbacks, seconds spent resimulating) since the last call."""
+        stats = self.frame_rollbacks, self.frame_resimulate_seconds
+        self.frame_rollbacks, self.frame_resimulate_seconds = 0, 0.0
+        return stats
+
+    def stats(self):
+        """Counters since the start of the match."""
+        return {
+            "ticks": self.ticks_played,
+            "rollbacks": self.rollbacks,
+            "resimulated_ticks": self.resimulated,
+            "resimulate_seconds": self.resimulate_seconds,
+            "mispredictions": self.mispredictions,
+            "stalls": self.stalls,
+            "waiting_for": self.ticks_played - self.remote_confirmed,
+        }
+
+
+def run_loopback(seconds=30, latency=0.05, jitter=0.0, loss=0.0, seed=0, ports=(7101, 7102),
+                 max_rollback=MAX_ROLLBACK):
+    """Play a match between two sessions over UDP on this computer, with random players.
+
+    Time is simulated (each tick moves the clock on by 1 / TICK_RATE), so a
+    long match takes less than a second. Returns the stats of both sessions,
+    the resimulation time of every frame, and whether both sides (and an
+    offline Match with the same buttons) ended in the same state.
+    """
+    now = [0.0]
+    clock = lambda: now[0]
+    transports = [UdpTransport(ports[player], ("127.0.0.1", ports[1 - player]), latency, jitter, loss,
+                               seed=f"{seed}-net-{player}", clock=clock) for player in (0, 1)]
+    sessions = [RollbackSession(player, transport, max_rollback) for player, transport in enumerate(transports)]
+    players = [RandomInput(f"{seed}-{player}") for player in (0, 1)]
+    played = [[], []]
+    ticks = round(seconds * TICK_RATE)
+    frame_resimulate = []
+
+    try:
+        # Each side plays its ticks (two per 60 Hz frame) unless it has to wait for the other
+        pending = [None, None]
+        step = 0
+        while min(session.ticks_played for session in sessions) < ticks:
+            for player, session in enumerate(sessions):
+                if session.ticks_played >= ticks:
+                    session.receive()
+                    session.send()
+                    continue
+                if pending[player] is None:
+                    pending[player] = players[player].poll()
+                if session.advance(pending[player]):
+                    played[player].append(pending[player])
+                    pending[player] = None
+                if step % 2:
+                    frame_resimulate.append(session.frame_stats()[1])
+            now[0] += 1 / TICK_RATE
+            step += 1
+
+        # Keep talking until both sides have all the other's buttons (any last rollbacks happen here)
+        while any(session.remote_confirmed < ticks for session in sessions):
+            for session in sessions:
+                session.receive()
+                session.send()
+            now[0] += 1 / TICK_RATE
+    finally:
+        for transport in transports:
+            transport.close()
+
+    offline = Match(None, None)
+    for buttons in zip(*played):
+        if not offline.is_over():
+            offline.step(*buttons)
+    states = [session.match.save() for session in sessions]
+    return {
+        "sessions": [session.stats() for session in sessions],
+        "frame_resimulate_seconds": frame_resimulate,
+        "in_sync": states[0] == states[1] == offline.save(),
+        "packets": [(transport.sent, transport.dropped) for transport in transports],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30, help="game time to play (default: 30)")
+    parser.add_argument("--latency", type=float, default=80, help="one-way delay in ms (default: 80)")
+    parser.add_argument("--jitter", type=float, default=0, help="random +/- ms on the delay (default: 0)")
+    parser.add_argument("--loss", type=float, default=0.05, help="chance a packet is lost (default: 0.05)")
+    parser.add_argument("--max-rollback", type=int, default=MAX_ROLLBACK,
+                        help=f"most ticks a session runs ahead of the other side (default: {MAX_ROLLBACK})")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the players and the network (default: 0)")
+    args = parser.parse_args(argv)
+
+    result = run_loopback(args.seconds, args.latency / 1000, args.jitter / 1000, args.loss, args.seed,
+                          max_rollback=args.max_rollback)
+    for player, (stats, (sent, dropped)) in enumerate(zip(result["sessions"], result["packets"])):
+        print(f"Player {player + 1}: {stats['rollbacks']} rollbacks, {stats['resimulated_ticks']} ticks "
+              f"resimulated in {stats['resimulate_seconds'] * 1000:.1f} ms, {stats['mispredictions']} wrong "
+              f"guesses, {stats['stalls']} ticks waiting; {sent} packets sent, {dropped} lost")
+    frames = sorted(result["frame_resimulate_seconds"])
+    if frames:
+        print(f"Resimulation per frame: mean {statistics.mean(frames) * 1000:.3f} ms, "
+              f"worst {frames[-1] * 1000:.3f} ms")
+    print("Both sides in sync with the offline match" if result["in_sync"] else "OUT OF SYNC")
+    if not result["in_sync"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Shared cache of rendered text, for all the games in this folder.
+
+screen.draw.text renders its text into a new Surface, works out where the
+anchor puts it and tidies up Pygame Zero's own text cache, on every call and
+every frame, even when the text hasn't changed since the last one. A score,
+a title or a line of instructions is usually the same for hundreds of frames
+in a row, so TextCache keeps the finished Surface and its position, keyed by
+the text and everything that changes how it looks (font, size, colour, anchor
+and position), and the next draw is a single blit. The oldest entries are
+dropped once there are too many, so a score that keeps changing can't fill
+up memory:
+
+    from text_cache import text_cache
+    text_cache.draw(screen, f"Score: {score}", midtop=(WIDTH // 2, 10), fontsize=40, color="white")
+    print(text_cache.stats())   # {'hits': 5890, 'misses': 12, ...}
+
+The games live in their own folders, so they add this folder to sys.path
+before importing it (see the top of each main.py).
+"""
+
+from collections import OrderedDict
+
+from pgzero import ptext
+from pgzero.rect import Rect
+
+
+class TextCache:
+    def __init__(self, max_size=256):
+        # Oldest entries are dropped once there are more than max_size texts
+        self.max_size = max_size
+        self._texts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text, pos=None, **options):
+        """Return (Surface, top-left corner) for text drawn like screen.draw.text would."""
+        # Colours can be lists, which can't be part of a key
+        key = (text, pos, tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                                       for name, value in options.items())))
+        rendered = self._texts.get(key)
+        if rendered is not None:
+            self.hits += 1
+            self._texts.move_to_end(key)
+            return rendered
+
+        self.misses += 1
+        # surf=None: render it and work out where it goes, but don't draw it anywhere
+        rendered = ptext.draw(text, pos, surf=None, **options)
+        self._texts[key] = rendered
+        if len(self._texts) > self.max_size:
+            self._texts.popitem(last=False)
+            self.evictions += 1
+        return rendered
+
+    def draw(self, screen, text, pos=None, **options):
+        """screen.draw.text(text, pos, **options), but only renders text it hasn't seen.
+
+        Returns the rectangle it drew on.
+        """
+        surface, topleft = self.get(text, pos, **options)
+        screen.blit(surface, topleft)
+        return Rect(topleft, surface.get_size())
+
+    def stats(self):
+        """Hit/miss counters and size of the cache."""
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._texts), "max_size": self.max_size,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        """Forget every rendered text and reset the counters."""
+        self._texts.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+# One cache for the whole game
+text_cache = TextCache()